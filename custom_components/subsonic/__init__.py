@@ -1,14 +1,49 @@
 from __future__ import annotations
 
 from homeassistant.const import __version__
-from homeassistant.core import HomeAssistant
+from homeassistant.core import Event, HomeAssistant, callback
 from homeassistant.config_entries import ConfigEntry
 from homeassistant.exceptions import ConfigEntryNotReady
 from homeassistant.helpers.aiohttp_client import async_get_clientsession
+from homeassistant.helpers.event import async_track_time_interval
+from homeassistant.helpers.storage import Store
 
-from .const import DOMAIN, LOGGER
+from .browseCache import BrowseCache, getListingTags
+from .capabilities import CONF_API_KEY, ServerCapabilities
+from .const import (
+    CONF_SMART_LISTS,
+    DOMAIN,
+    ENDPOINT_PROBE_INTERVAL,
+    EVENT_NEW_ALBUM,
+    LOGGER,
+    PLATFORMS,
+    PLAYLIST_SYNC_INTERVAL,
+    STORAGE_VERSION,
+)
+from .endpointPool import CONF_SERVER_URLS, EndpointPool
+from .jukebox import CONF_JUKEBOX, JukeboxCoordinator
+from .library import LibraryCache
+from .models import SubsonicData
+from .nowPlaying import NowPlayingCoordinator
+from .playlistCache import PlaylistCache
+from .prefetch import CONF_PREFETCH, Prefetcher
+from .radio import RadioManager
+from .requestScheduler import Priority, withPriority
+from .recentAlbums import RecentAlbumsCoordinator
+from .scrobbler import Scrobbler
+from .smartLists import SmartLists
+from .starredCache import StarredCache
+from .streamProfiles import CONF_HLS
+from .streamRelay import (
+    CONF_STREAM_CACHE_SIZE,
+    CONF_STREAM_RELAY,
+    DEFAULT_CACHE_SIZE,
+    StreamRelay,
+    SubsonicStreamView,
+)
 from .subsonicApi import SubsonicApi
-from .services import async_register_services  # ← ไฟล์ใหม่ที่เราจะสร้าง
+from .services import async_register_services, async_unload_services  # ← ไฟล์ใหม่ที่เราจะสร้าง
+from .websocket_api import async_register_websocket_commands
 
 
 async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
@@ -22,9 +57,17 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     api = SubsonicApi(
         session=session,
         userAgent=user_agent,
-        config=entry.data,
+        # api key (OpenSubsonic) อยู่ใน options ใช้เมื่อ server รองรับเท่านั้น
+        config={**entry.data, "api_key": entry.options.get(CONF_API_KEY)},
     )
 
+    # URL อื่นของ server เดียวกัน (เช่น LAN) → ใช้ตัวที่ตอบเร็วที่สุด
+    serverUrls = [entry.data.get("url"), *entry.options.get(CONF_SERVER_URLS, [])]
+    if len(set(filter(None, serverUrls))) > 1:
+        api.endpoints = EndpointPool(serverUrls)
+        await api.probeEndpoints()
+        LOGGER.debug("Subsonic endpoints: using %s", api.endpoints.best)
+
     # ทดสอบ ping server
     try:
         result = await api.ping()
@@ -32,24 +75,169 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
         # ถ้า ping ไม่สำเร็จ ให้ raise ConfigEntryNotReady เพื่อให้ HA ลองใหม่ทีหลัง
         raise ConfigEntryNotReady("Could not connect to Subsonic API") from err
 
-    # เก็บ api ลงใน hass.data (รองรับหลาย config entry ในอนาคต)
+    # server ตอบแต่ไม่ ok (เช่น รหัสผ่านผิด) → ยังไม่สร้างอะไรทั้งนั้น
+    if not result:
+        raise ConfigEntryNotReady("Subsonic API ping was not ok")
+
+    # OpenSubsonic extensions ถามครั้งเดียวต่อ server version แล้วเก็บไว้
+    capabilitiesStore = Store(hass, STORAGE_VERSION, f"{DOMAIN}.{entry.entry_id}.capabilities")
+    stored = ServerCapabilities.fromDict(await capabilitiesStore.async_load())
+    capabilities = await api.detectCapabilities(stored, hls=entry.options.get(CONF_HLS, False))
+    if capabilities != stored:
+        await capabilitiesStore.async_save(capabilities.asDict())
+
+    playlists = PlaylistCache(hass, api, entry.entry_id)
+    await playlists.async_load()
+
+    recent = RecentAlbumsCoordinator(hass, api, entry.entry_id)
+    await recent.async_load()
+    await recent.async_config_entry_first_refresh()
+
+    starred = StarredCache(hass, api, entry.entry_id)
+    await starred.async_load()
+    entry.async_on_unload(starred.async_stop)
+
+    data = SubsonicData(
+        entry=entry,
+        api=api,
+        playlists=playlists,
+        recent=recent,
+        library=LibraryCache(api),
+        starred=starred,
+        nowPlaying=NowPlayingCoordinator(hass, api),
+        browse=BrowseCache(),
+        smartLists=SmartLists(hass, api, starred),
+    )
+
+    # browse node ที่สร้างไว้จะถูกทิ้งเฉพาะเมื่อข้อมูลของมันเปลี่ยน
+    browse = data.browse
+    api.onListingChanged = lambda path, params: browse.invalidate(getListingTags(path, params))
+    playlists.onChange = lambda ids: browse.invalidate(
+        ["playlist", *(f"playlist:{id}" for id in ids)]
+    )
+    starred.onChange = lambda: browse.invalidate(["favorites", "smartlist:starred"])
+    if api.endpoints is not None:
+        # node เดิมมี URL รูปของ endpoint เก่าอยู่
+        api.endpoints.onSwitch = lambda old, new: browse.clear()
+
+    @callback
+    def async_new_album(event: Event) -> None:
+        browse.invalidate(
+            [
+                "albums",
+                "artists",
+                "genres",
+                f"artist:{event.data.get('artistId')}",
+                f"album:{event.data.get('id')}",
+            ]
+        )
+
+    entry.async_on_unload(hass.bus.async_listen(EVENT_NEW_ALBUM, async_new_album))
+
+    if entry.options.get(CONF_PREFETCH, False):
+        data.prefetch = Prefetcher(hass, browse)
+
+    # ลำโพงที่ต่อกับเครื่อง server โดยตรง (jukeboxControl)
+    if entry.options.get(CONF_JUKEBOX, False):
+        data.jukebox = JukeboxCoordinator(hass, api)
+
+    data.radio = RadioManager(hass, data)
+    entry.async_on_unload(data.radio.stopAll)
+
+    # นับ play ของเพลงที่ส่งไปเล่นบน media_player → scrobble กลับไปที่ server
+    data.scrobbler = Scrobbler(hass, api, entry.entry_id)
+    await data.scrobbler.async_setup()
+    # เพลงเริ่มเล่นบน player ของเรา → now playing กลับมา poll เร็ว
+    data.scrobbler.onPlay = data.nowPlaying.poke
+    entry.async_on_unload(data.scrobbler.async_stop)
+
+    if entry.options.get(CONF_STREAM_RELAY, False):
+        data.relay = StreamRelay(
+            hass,
+            api,
+            entry.entry_id,
+            entry.options.get(CONF_STREAM_CACHE_SIZE, DEFAULT_CACHE_SIZE),
+        )
+        await data.relay.async_setup()
+
+        if not hass.data.get(f"{DOMAIN}_view_registered"):
+            hass.http.register_view(SubsonicStreamView(hass))
+            hass.data[f"{DOMAIN}_view_registered"] = True
+
+    # websocket สำหรับ custom card (query library ทีละหน้า)
+    if not hass.data.get(f"{DOMAIN}_websocket_registered"):
+        async_register_websocket_commands(hass)
+        hass.data[f"{DOMAIN}_websocket_registered"] = True
+
+    # เก็บ data ลงใน hass.data (รองรับหลาย config entry ในอนาคต)
     hass.data.setdefault(DOMAIN, {})
-    hass.data[DOMAIN][entry.entry_id] = api
-    
+    hass.data[DOMAIN][entry.entry_id] = data
+
+    @withPriority(Priority.BACKGROUND)
+    async def async_sync_playlists(_now=None) -> None:
+        try:
+            await playlists.async_refresh()
+        except Exception as err:
+            LOGGER.warning("Playlist sync failed: %s", err)
+
+    entry.async_on_unload(
+        async_track_time_interval(hass, async_sync_playlists, PLAYLIST_SYNC_INTERVAL)
+    )
+    entry.async_create_background_task(
+        hass, async_sync_playlists(), "subsonic_playlist_sync"
+    )
+
+    @withPriority(Priority.BACKGROUND)
+    async def async_sync_starred() -> None:
+        try:
+            await starred.async_refresh()
+        except Exception as err:
+            LOGGER.warning("Starred sync failed: %s", err)
+
+    entry.async_create_background_task(hass, async_sync_starred(), "subsonic_starred_sync")
+
+    if api.endpoints is not None:
+        @withPriority(Priority.BACKGROUND)
+        async def async_probe_endpoints(_now=None) -> None:
+            await api.probeEndpoints()
+
+        entry.async_on_unload(
+            async_track_time_interval(hass, async_probe_endpoints, ENDPOINT_PROBE_INTERVAL)
+        )
+
+    # newest / recently played / most played / top rated เปิดได้ทันที
+    if entry.options.get(CONF_SMART_LISTS, True):
+        data.smartLists.async_start()
+        entry.async_on_unload(data.smartLists.async_stop)
+
+    await hass.config_entries.async_forward_entry_setups(entry, PLATFORMS)
+
+    # options เปลี่ยน (เช่นเปิด stream relay) → reload entry
+    entry.async_on_unload(entry.add_update_listener(async_reload_entry))
 
     # Register services (play_media, play_album, play_playlist, ...)
-    await async_register_services(hass, api)
+    await async_register_services(hass, entry.entry_id)
+
+    return True
+
 
-    return result
+async def async_reload_entry(hass: HomeAssistant, entry: ConfigEntry) -> None:
+    """Reload a config entry after its options changed."""
+    await hass.config_entries.async_reload(entry.entry_id)
 
 
 async def async_unload_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     """Unload a config entry."""
+    if not await hass.config_entries.async_unload_platforms(entry, PLATFORMS):
+        return False
+
     # ลบข้อมูลของ entry นี้ออกจาก hass.data
     if DOMAIN in hass.data and entry.entry_id in hass.data[DOMAIN]:
         del hass.data[DOMAIN][entry.entry_id]
 
-    # ถ้าคุณอยากจะ unregister services ตอน unload entry สุดท้าย
-    # สามารถเช็ค len(hass.data[DOMAIN]) == 0 แล้ว unregister ที่นี่ได้
-    # (ตอนนี้ยังไม่ทำ เพื่อความง่าย)
+    # entry สุดท้ายถูก unload (รวมถึงตอน reload หลังแก้ options)
+    # → ลบ services ออก แล้ว setup รอบใหม่จะ register ใหม่
+    if not hass.data.get(DOMAIN):
+        async_unload_services(hass)
+
     return True
@@ -0,0 +1,120 @@
+from __future__ import annotations
+
+import copy
+import time
+from collections import OrderedDict
+from typing import Iterable
+
+from homeassistant.components.media_source.models import BrowseMediaSource
+
+from .const import LIBRARY_CACHE_TTL, LOGGER, SMART_LISTS
+
+MAX_NODES = 200
+
+# listing endpoint → browse tags built from it
+LISTING_BROWSE_TAGS = {
+    "getArtists": ["artists"],
+    "getAlbumList2": ["albums"],
+    "getGenres": ["genres"],
+    "getPlaylists": ["playlist"],
+    "getInternetRadioStations": ["radio"],
+}
+
+
+def getListingTags(path: str, params: dict | None = None) -> list[str]:
+    """Return the browse tags to drop when a listing changed on the server."""
+    # ranking อื่นของ getAlbumList2 ไม่กระทบรายการ album ทั้งหมด
+    params = params or {}
+
+    listType = params.get("type")
+    if path == "getAlbumList2" and listType in SMART_LISTS:
+        return [f"smartlist:{listType}"]
+
+    # listing ของรายการเดียว → ทิ้งเฉพาะ node ของรายการนั้น
+    if path == "getAlbum":
+        return [f"album:{params.get('id')}"]
+    if path == "getMusicDirectory":
+        return [f"directory:{params.get('id')}"]
+    if path == "getIndexes":
+        folderId = params.get("musicFolderId")
+        return ["folders", f"folder:{folderId}"] if folderId else ["folders"]
+
+    return LISTING_BROWSE_TAGS.get(path, [])
+
+
+def getBrowseTags(identifier: str) -> set[str]:
+    """Return the data a browse node is built from, as invalidation tags."""
+    kind, _, rest = identifier.partition("/")
+
+    if kind == "browser":
+        return {rest}
+    if kind in ("genre", "genrepage"):
+        return {"genres"}
+    if kind in ("folder", "folderpage"):
+        # folderpage/{offset}/{folderId}
+        folderId = rest.split("/", 1)[-1]
+        return {"folders", f"folder:{folderId}"}
+    if kind == "directorypage":
+        return {f"directory:{rest.split('/', 1)[-1]}"}
+    if kind == "artist":
+        # รายการ album ของ artist เปลี่ยนเมื่อมี album ใหม่
+        return {f"artist:{rest}", "albums"}
+
+    return {f"{kind}:{rest}"}
+
+
+class BrowseCache:
+    """Built browse nodes kept per identifier until their data changes.
+
+    Every node carries tags such as ``albums``, ``genres`` or
+    ``playlist:<id>``; ``invalidate`` drops the nodes of the given tags.
+    Nodes also expire after ``LIBRARY_CACHE_TTL`` as a safety net for
+    changes nothing reports.
+    """
+
+    def __init__(self) -> None:
+        self.__nodes: OrderedDict[str, tuple[float, set[str], BrowseMediaSource]] = OrderedDict()
+
+    def __contains__(self, identifier: str) -> bool:
+        cached = self.__nodes.get(identifier)
+
+        return cached is not None and time.monotonic() - cached[0] <= LIBRARY_CACHE_TTL.total_seconds()
+
+    def get(self, identifier: str) -> BrowseMediaSource | None:
+        cached = self.__nodes.get(identifier)
+        if cached is None:
+            return None
+
+        builtAt, _, node = cached
+        if time.monotonic() - builtAt > LIBRARY_CACHE_TTL.total_seconds():
+            del self.__nodes[identifier]
+            return None
+
+        self.__nodes.move_to_end(identifier)
+
+        # HA อาจ filter children ของ node ที่ได้ไป → ส่งสำเนาตื้นออกไป
+        node = copy.copy(node)
+        if node.children is not None:
+            node.children = list(node.children)
+
+        return node
+
+    def put(self, identifier: str, node: BrowseMediaSource) -> None:
+        self.__nodes[identifier] = (time.monotonic(), getBrowseTags(identifier), node)
+        self.__nodes.move_to_end(identifier)
+
+        while len(self.__nodes) > MAX_NODES:
+            self.__nodes.popitem(last=False)
+
+    def invalidate(self, tags: Iterable[str]) -> None:
+        tags = set(tags)
+        stale = [key for key, (_, nodeTags, _) in self.__nodes.items() if nodeTags & tags]
+
+        for key in stale:
+            del self.__nodes[key]
+
+        if stale:
+            LOGGER.debug("Browse cache: dropped %d node(s) for %s", len(stale), sorted(tags))
+
+    def clear(self) -> None:
+        self.__nodes.clear()
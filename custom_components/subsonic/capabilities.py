@@ -0,0 +1,67 @@
+from __future__ import annotations
+
+from dataclasses import asdict, dataclass, field
+
+CONF_API_KEY = "api_key"
+
+# OpenSubsonic extensions this integration knows how to use
+EXT_FORM_POST = "formPost"
+EXT_API_KEY = "apiKeyAuthentication"
+
+# requests with more parameters than this go as a form POST when possible
+FORM_POST_MIN_PARAMS = 20
+# answer of a server that has hls.m3u8 when asked without a song id
+ERROR_MISSING_PARAMETER = "10"
+
+
+def parseVersion(version: str | None) -> tuple[int, ...]:
+    """Return "1.16.1" as (1, 16, 1); unparsable parts count as 0."""
+    parts = []
+
+    for part in (version or "").split("."):
+        try:
+            parts.append(int(part))
+        except ValueError:
+            parts.append(0)
+
+    return tuple(parts)
+
+
+@dataclass
+class ServerCapabilities:
+    """What the server told us about itself in ``ping`` and
+    ``getOpenSubsonicExtensions``, and whether it streams HLS.
+
+    Kept per config entry and only asked again when the server version
+    changes; a plain Subsonic server simply has no extensions. ``hls`` is
+    None until the server has been asked.
+    """
+
+    apiVersion: str | None = None
+    openSubsonic: bool = False
+    serverType: str | None = None
+    serverVersion: str | None = None
+    extensions: dict[str, list[int]] = field(default_factory=dict)
+    hls: bool | None = None
+
+    def supports(self, extension: str, version: int = 1) -> bool:
+        return version in self.extensions.get(extension, [])
+
+    def sameServer(self, other: ServerCapabilities) -> bool:
+        return (self.openSubsonic, self.serverType, self.serverVersion, self.apiVersion) == (
+            other.openSubsonic, other.serverType, other.serverVersion, other.apiVersion
+        )
+
+    def asDict(self) -> dict:
+        return asdict(self)
+
+    @classmethod
+    def fromDict(cls, data: dict | None) -> ServerCapabilities | None:
+        if not data:
+            return None
+
+        try:
+            return cls(**data)
+        except TypeError:
+            # stored by another version of the integration → ask the server again
+            return None
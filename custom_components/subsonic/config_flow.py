@@ -6,12 +6,26 @@ import voluptuous as vol
 
 from homeassistant import config_entries
 from homeassistant.const import CONF_URL, CONF_USERNAME, CONF_PASSWORD
-from homeassistant.core import HomeAssistant
+from homeassistant.core import HomeAssistant, callback
 from homeassistant.data_entry_flow import FlowResult
 from homeassistant.exceptions import HomeAssistantError
+from homeassistant.helpers import selector
 from homeassistant.helpers.aiohttp_client import async_get_clientsession
 
-from .const import DOMAIN, LOGGER
+from .capabilities import CONF_API_KEY
+from .const import CONF_SMART_LISTS, DOMAIN, LOGGER
+from .endpointPool import CONF_SERVER_URLS
+from .jukebox import CONF_JUKEBOX
+from .prefetch import CONF_PREFETCH
+from .streamProfiles import (
+    CONF_HLS,
+    CONF_HLS_BITRATES,
+    CONF_HLS_PLAYERS,
+    DEFAULT_HLS_LADDER,
+    HLS_BITRATES,
+    PROFILE_OPTIONS,
+)
+from .streamRelay import CONF_STREAM_CACHE_SIZE, CONF_STREAM_RELAY, DEFAULT_CACHE_SIZE
 from .subsonicApi import SubsonicApi
 
 
@@ -64,6 +78,14 @@ class ConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
 
     VERSION = 1
 
+    @staticmethod
+    @callback
+    def async_get_options_flow(
+        config_entry: config_entries.ConfigEntry,
+    ) -> OptionsFlowHandler:
+        """Return the options flow for this handler."""
+        return OptionsFlowHandler(config_entry)
+
     async def async_step_user(
         self, user_input: dict[str, Any] | None = None
     ) -> FlowResult:
@@ -110,8 +132,20 @@ class ConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
         return await self.async_step_user(user_input)
 
 
+BROWSE_OPTIONS = {
+    "artists": True,
+    "albums": True,
+    "playlists": True,
+    "genres": True,
+    "favorites": True,
+    CONF_SMART_LISTS: True,
+    "folders": False,
+    "radio": False,
+}
+
+
 class OptionsFlowHandler(config_entries.OptionsFlow):
-    """Handle options for Subsonic (future use)."""
+    """Handle options for Subsonic."""
 
     def __init__(self, config_entry: config_entries.ConfigEntry) -> None:
         """Initialize options flow."""
@@ -120,4 +154,76 @@ class OptionsFlowHandler(config_entries.OptionsFlow):
     async def async_step_init(
         self, user_input: dict[str, Any] | None = None
     ) -> FlowResult:
-        return self.async_show_form(step_id="init")
\ No newline at end of file
+        if user_input is not None:
+            return self.async_create_entry(title="", data=user_input)
+
+        options = self.config_entry.options
+        schema: dict = {}
+
+        for option, default in BROWSE_OPTIONS.items():
+            schema[vol.Optional(option, default=options.get(option, default))] = bool
+
+        # player ที่อยู่ใน list ไหน จะได้ stream profile นั้น (lossless / standard / low)
+        for option in PROFILE_OPTIONS:
+            schema[vol.Optional(option, default=options.get(option, []))] = (
+                selector.EntitySelector(
+                    selector.EntitySelectorConfig(domain="media_player", multiple=True)
+                )
+            )
+
+        # OpenSubsonic API key ใช้แทนรหัสผ่านถ้า server รองรับ
+        schema[vol.Optional(
+            CONF_API_KEY,
+            description={"suggested_value": options.get(CONF_API_KEY)},
+        )] = selector.TextSelector(
+            selector.TextSelectorConfig(type=selector.TextSelectorType.PASSWORD)
+        )
+
+        # URL อื่นของ server เดียวกัน (LAN / WAN) เลือกตัวที่เร็วที่สุดให้เอง
+        schema[vol.Optional(
+            CONF_SERVER_URLS, default=options.get(CONF_SERVER_URLS, [])
+        )] = selector.TextSelector(
+            selector.TextSelectorConfig(type=selector.TextSelectorType.URL, multiple=True)
+        )
+
+        # HLS: player เลือก bitrate เองตามความเร็วของ link
+        schema[vol.Optional(CONF_HLS, default=options.get(CONF_HLS, False))] = bool
+        schema[vol.Optional(
+            CONF_HLS_PLAYERS, default=options.get(CONF_HLS_PLAYERS, [])
+        )] = selector.EntitySelector(
+            selector.EntitySelectorConfig(domain="media_player", multiple=True)
+        )
+        schema[vol.Optional(
+            CONF_HLS_BITRATES,
+            default=options.get(CONF_HLS_BITRATES, [str(b) for b in DEFAULT_HLS_LADDER]),
+        )] = selector.SelectSelector(
+            selector.SelectSelectorConfig(
+                options=[str(b) for b in HLS_BITRATES], multiple=True
+            )
+        )
+
+        # relay stream ผ่าน HA + cache เพลงลง disk
+        schema[vol.Optional(
+            CONF_STREAM_RELAY, default=options.get(CONF_STREAM_RELAY, False)
+        )] = bool
+        schema[vol.Optional(
+            CONF_STREAM_CACHE_SIZE,
+            default=options.get(CONF_STREAM_CACHE_SIZE, DEFAULT_CACHE_SIZE),
+        )] = selector.NumberSelector(
+            selector.NumberSelectorConfig(
+                min=0, max=100000, step=64, unit_of_measurement="MB",
+                mode=selector.NumberSelectorMode.BOX,
+            )
+        )
+
+        # เตรียม album/playlist ที่น่าจะถูกเปิดต่อไว้ล่วงหน้า
+        schema[vol.Optional(
+            CONF_PREFETCH, default=options.get(CONF_PREFETCH, False)
+        )] = bool
+
+        # media_player ที่เล่นผ่านลำโพงของ server เอง
+        schema[vol.Optional(
+            CONF_JUKEBOX, default=options.get(CONF_JUKEBOX, False)
+        )] = bool
+
+        return self.async_show_form(step_id="init", data_schema=vol.Schema(schema))
\ No newline at end of file
@@ -1,6 +1,9 @@
 import logging
+from datetime import timedelta
 from typing import Final
 
+from homeassistant.const import Platform
+
 DOMAIN: Final = "subsonic"
 
 LOGGER = logging.getLogger(__package__)
@@ -8,4 +11,41 @@ LOGGER = logging.getLogger(__package__)
 TITLE: Final = {
     "subsonic": "Subsonic",
     "navidrome": "Navidrome"
-}
\ No newline at end of file
+}
+
+PLATFORMS: Final = [Platform.MEDIA_PLAYER, Platform.SENSOR]
+
+STORAGE_VERSION: Final = 1
+
+PLAYLIST_SYNC_INTERVAL: Final = timedelta(minutes=15)
+
+RECENT_SYNC_INTERVAL: Final = timedelta(minutes=10)
+
+SCROBBLE_FLUSH_INTERVAL: Final = timedelta(minutes=5)
+
+ENDPOINT_PROBE_INTERVAL: Final = timedelta(minutes=5)
+
+LIBRARY_CACHE_TTL: Final = timedelta(hours=1)
+
+# songs per getSongsByGenre request (playback); browse pages are smaller
+GENRE_PAGE_SIZE: Final = 500
+
+GENRE_BROWSE_PAGE_SIZE: Final = 100
+
+FOLDER_BROWSE_PAGE_SIZE: Final = 200
+
+# getAlbumList2 rankings shown as smart lists → refresh interval
+# (None: kept up to date elsewhere)
+SMART_LISTS: Final = {
+    "newest": timedelta(minutes=30),
+    "recent": timedelta(minutes=5),
+    "frequent": timedelta(hours=1),
+    "highest": timedelta(hours=6),
+    "starred": None,
+}
+
+SMART_LIST_SIZE: Final = 50
+# option: show (and keep refreshing) the smart lists
+CONF_SMART_LISTS: Final = "smart_lists"
+
+EVENT_NEW_ALBUM: Final = "subsonic_new_album"
@@ -0,0 +1,100 @@
+from __future__ import annotations
+
+import time
+from typing import Callable, Iterable
+
+from .const import LOGGER
+
+CONF_SERVER_URLS = "server_urls"
+
+# weight of a new latency sample in the running average
+LATENCY_WEIGHT = 0.3
+# another endpoint must be this much faster before we move to it
+SWITCH_MARGIN = 0.2
+# an endpoint that failed is skipped for this long (seconds), unless all failed
+RETRY_AFTER = 120
+# only answers up to this size (bytes) are latency samples, bigger ones
+# mostly measure the download
+LATENCY_MAX_BYTES = 4096
+
+
+class EndpointPool:
+    """Base URLs that reach the same server, ranked by measured latency.
+
+    Every small answer (pings, 304s, short responses) feeds its round trip
+    time into a running average of its endpoint, and periodic pings measure
+    the others. The fastest healthy endpoint is used; a connection failure
+    marks an endpoint down for ``RETRY_AFTER`` seconds so requests fail
+    over at once. ``onSwitch`` lets URL caches follow a switch.
+    """
+
+    def __init__(self, urls: Iterable[str]) -> None:
+        self.urls = list(dict.fromkeys(url.rstrip("/") for url in urls if url))
+        if not self.urls:
+            raise ValueError("At least one server URL is needed")
+
+        self.__latency: dict[str, float] = {}
+        self.__downUntil: dict[str, float] = {}
+        self.__best = self.urls[0]
+        # called with (old, new) base URL after switching endpoints
+        self.onSwitch: Callable[[str, str], None] | None = None
+
+    @property
+    def best(self) -> str:
+        return self.__best
+
+    def latency(self, url: str) -> float | None:
+        return self.__latency.get(url)
+
+    def __healthy(self) -> list[str]:
+        now = time.monotonic()
+        return [url for url in self.urls if self.__downUntil.get(url, 0) <= now]
+
+    def record(self, url: str, seconds: float) -> None:
+        """Take one answered request of ``url`` into account."""
+        if url not in self.urls:
+            return
+
+        previous = self.__latency.get(url)
+        self.__latency[url] = (
+            seconds if previous is None
+            else previous + LATENCY_WEIGHT * (seconds - previous)
+        )
+        self.__downUntil.pop(url, None)
+        self.__choose()
+
+    def markDown(self, url: str) -> None:
+        """Skip ``url`` for a while after it could not be reached."""
+        if url not in self.urls:
+            return
+
+        self.__downUntil[url] = time.monotonic() + RETRY_AFTER
+        self.__latency.pop(url, None)
+        self.__choose()
+
+    def __choose(self) -> None:
+        # ถ้าล่มหมดทุกตัว ก็ยังต้องลองสักตัว
+        candidates = self.__healthy() or self.urls
+        measured = [url for url in candidates if url in self.__latency]
+        best = min(measured, key=self.__latency.__getitem__) if measured else candidates[0]
+
+        current = self.__best
+        if (best != current
+            and current in candidates
+            and current in self.__latency
+            and self.__latency[best] > self.__latency[current] * (1 - SWITCH_MARGIN)):
+            # ต่างกันนิดเดียว ไม่ต้องสลับไปมา
+            return
+
+        if best != current:
+            LOGGER.info(
+                "Switching Subsonic endpoint from %s to %s (%s)",
+                current,
+                best,
+                "unreachable" if current not in candidates
+                else f"{self.__latency.get(best, 0) * 1000:.0f} ms",
+            )
+            self.__best = best
+
+            if self.onSwitch is not None:
+                self.onSwitch(current, best)
@@ -0,0 +1,89 @@
+from __future__ import annotations
+
+from datetime import timedelta
+
+from homeassistant.core import HomeAssistant
+from homeassistant.helpers.update_coordinator import DataUpdateCoordinator, UpdateFailed
+
+from .const import LOGGER
+from .requestScheduler import Priority, withPriority
+from .subsonicApi import SubsonicApi
+
+CONF_JUKEBOX = "jukebox"
+
+PLAYING_INTERVAL = timedelta(seconds=5)
+IDLE_INTERVAL = timedelta(minutes=1)
+
+
+class JukeboxCoordinator(DataUpdateCoordinator[dict]):
+    """Queue and status of the server's jukebox.
+
+    Polls the small ``status`` answer (index, playing, gain, position) and
+    only asks for the whole queue (``get``) when the current index moved or
+    the queue was changed from here. Every queue operation is one
+    ``jukeboxControl`` call, whatever the number of songs.
+    """
+
+    def __init__(self, hass: HomeAssistant, api: SubsonicApi) -> None:
+        super().__init__(
+            hass,
+            LOGGER,
+            name="Subsonic jukebox",
+            update_interval=IDLE_INTERVAL,
+        )
+        self.api = api
+        self.entityId: str | None = None
+        self.__entries: list[dict] = []
+        self.__queueStale = True
+
+    @withPriority(Priority.BACKGROUND)
+    async def _async_update_data(self) -> dict:
+        try:
+            if self.__queueStale:
+                status = await self.api.jukeboxControl("get")
+                self.__entries = status.pop("entries", [])
+                self.__queueStale = False
+            else:
+                status = await self.api.jukeboxControl("status")
+        except Exception as err:
+            raise UpdateFailed(f"Error fetching jukebox status: {err}") from err
+
+        previous = self.data or {}
+        if previous and previous.get("currentIndex") != status.get("currentIndex"):
+            # เพลงเปลี่ยน → รอบหน้าดึงคิวใหม่ด้วย (เผื่อมีคนแก้คิวจากที่อื่น)
+            self.__queueStale = True
+
+        playing = status.get("playing") == "true"
+        self.update_interval = PLAYING_INTERVAL if playing else IDLE_INTERVAL
+
+        return {**status, "entries": self.__entries}
+
+    @property
+    def current(self) -> dict | None:
+        data = self.data or {}
+
+        try:
+            index = int(data.get("currentIndex", -1))
+        except (TypeError, ValueError):
+            return None
+
+        entries = data.get("entries", [])
+        return entries[index] if 0 <= index < len(entries) else None
+
+    async def async_control(self, action: str, *, queueChanged: bool = False, **params) -> None:
+        """Send one jukebox action and refresh the state right after."""
+        await self.api.jukeboxControl(action, **params)
+
+        if queueChanged:
+            self.__queueStale = True
+
+        await self.async_request_refresh()
+
+    async def async_set(self, ids: list[str], start: bool = True) -> None:
+        """Replace the queue with ``ids`` (one request) and start playing."""
+        await self.api.jukeboxControl("set", id=ids)
+        await self.async_control("start" if start else "status", queueChanged=True)
+
+    async def async_add(self, ids: list[str]) -> None:
+        """Append ``ids`` to the queue with one request."""
+        await self.async_control("add", queueChanged=True, id=ids)
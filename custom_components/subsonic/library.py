@@ -0,0 +1,148 @@
+from __future__ import annotations
+
+import asyncio
+import time
+from collections import OrderedDict
+from typing import Any, Mapping
+
+from .const import LIBRARY_CACHE_TTL, LOGGER
+from .subsonicApi import SubsonicApi
+
+KINDS = ("artists", "albums", "tracks")
+PAGE_SIZE = 500
+QUERY_CACHE_SIZE = 16
+
+
+def _asBool(value: Any) -> bool:
+    # JSON ให้ true/false มา แต่ XML ให้เป็น string "true"/"false"
+    if isinstance(value, str):
+        return value.strip().lower() in ("true", "1", "yes")
+
+    return bool(value)
+
+
+def _matches(item: Mapping, filters: Mapping[str, Any]) -> bool:
+    for field, expected in filters.items():
+        value = item.get(field)
+        if value is None:
+            return False
+
+        if isinstance(expected, bool) or isinstance(value, bool):
+            if _asBool(value) != _asBool(expected):
+                return False
+        elif isinstance(expected, str):
+            if expected.lower() not in str(value).lower():
+                return False
+        elif str(value) != str(expected):
+            return False
+
+    return True
+
+
+def _sortKey(field: str):
+    def key(item: Mapping) -> tuple:
+        value = item.get(field)
+        if value is None:
+            return (2, 0, "")
+
+        try:
+            return (0, float(value), "")
+        except (TypeError, ValueError):
+            return (1, 0, str(value).lower())
+
+    return key
+
+
+class LibraryCache:
+    """In-memory copy of the library for filtered, sorted and paged queries.
+
+    Lists are loaded on first use (one request per 500 items) and kept for
+    ``LIBRARY_CACHE_TTL``; results of recent queries are kept in order so
+    paging through them does not sort the library again.
+    """
+
+    def __init__(self, api: SubsonicApi) -> None:
+        self.api = api
+        self.version = 0
+        self.__lists: dict[str, list[dict]] = {}
+        self.__loadedAt: dict[str, float] = {}
+        self.__locks = {kind: asyncio.Lock() for kind in KINDS}
+        self.__queries: OrderedDict[tuple, list[dict]] = OrderedDict()
+
+    async def __async_fetch_all(self, fetchPage) -> list[dict]:
+        items: list[dict] = []
+        offset = 0
+
+        while True:
+            page = await fetchPage(offset)
+            items.extend(page)
+
+            if len(page) < PAGE_SIZE:
+                return items
+
+            offset += PAGE_SIZE
+
+    async def __async_load(self, kind: str) -> list[dict]:
+        if kind == "artists":
+            return await self.api.getArtists()
+
+        if kind == "albums":
+            return await self.__async_fetch_all(
+                lambda offset: self.api.getAlbumList(
+                    "alphabeticalByName", size=PAGE_SIZE, offset=offset
+                )
+            )
+
+        return await self.__async_fetch_all(
+            lambda offset: self.api.search3("", songCount=PAGE_SIZE, songOffset=offset)
+        )
+
+    async def async_get(self, kind: str, refresh: bool = False) -> list[dict]:
+        """Return every item of ``kind``, loading it when missing or expired."""
+        async with self.__locks[kind]:
+            loadedAt = self.__loadedAt.get(kind)
+            expired = (
+                loadedAt is None
+                or time.monotonic() - loadedAt > LIBRARY_CACHE_TTL.total_seconds()
+            )
+
+            if refresh or expired:
+                items = await self.__async_load(kind)
+                LOGGER.debug("Library cache loaded %d %s", len(items), kind)
+
+                self.__lists[kind] = items
+                self.__loadedAt[kind] = time.monotonic()
+                self.version += 1
+                self.__queries.clear()
+
+            return self.__lists[kind]
+
+    async def async_refresh(self, kinds: tuple[str, ...] = KINDS) -> None:
+        for kind in kinds:
+            await self.async_get(kind, refresh=True)
+
+    async def async_query(
+        self,
+        kind: str,
+        filters: Mapping[str, Any] | None = None,
+        sort: str | None = None,
+        descending: bool = False,
+    ) -> list[dict]:
+        """Return the filtered and sorted items of ``kind``."""
+        items = await self.async_get(kind)
+        key = (kind, self.version, tuple(sorted((filters or {}).items())), sort, descending)
+
+        if key in self.__queries:
+            self.__queries.move_to_end(key)
+            return self.__queries[key]
+
+        result = [item for item in items if _matches(item, filters)] if filters else list(items)
+
+        if sort:
+            result.sort(key=_sortKey(sort), reverse=descending)
+
+        self.__queries[key] = result
+        while len(self.__queries) > QUERY_CACHE_SIZE:
+            self.__queries.popitem(last=False)
+
+        return result
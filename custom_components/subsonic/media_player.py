@@ -0,0 +1,253 @@
+from __future__ import annotations
+
+from typing import Any, AsyncIterator
+
+from homeassistant.components import media_source
+from homeassistant.components.media_player import (
+    BrowseMedia,
+    MediaPlayerEnqueue,
+    MediaPlayerEntity,
+    MediaPlayerEntityFeature,
+    MediaPlayerState,
+    MediaType,
+)
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.exceptions import HomeAssistantError
+from homeassistant.helpers.entity_platform import AddEntitiesCallback
+from homeassistant.helpers.update_coordinator import CoordinatorEntity
+from homeassistant.util import dt as dt_util
+
+from .const import DOMAIN
+from .jukebox import JukeboxCoordinator
+from .models import SubsonicData
+from .scrobbler import getSongIdFromUrl
+
+# media_source identifier prefix → async_fetch_tracks media type
+MEDIA_SOURCE_TYPES = {
+    "song": "track",
+    "album": "album",
+    "playlist": "playlist",
+    "artist": "artist",
+    "genre": "genre",
+    "directory": "folder",
+}
+
+
+async def async_setup_entry(
+    hass: HomeAssistant,
+    entry: ConfigEntry,
+    async_add_entities: AddEntitiesCallback,
+) -> None:
+    """Set up the Subsonic jukebox player when it is enabled in the options."""
+    data: SubsonicData = hass.data[DOMAIN][entry.entry_id]
+
+    if data.jukebox is None:
+        return
+
+    async_add_entities([SubsonicJukeboxPlayer(data, entry)])
+
+
+class SubsonicJukeboxPlayer(CoordinatorEntity[JukeboxCoordinator], MediaPlayerEntity):
+    """The server's own audio output, driven through ``jukeboxControl``."""
+
+    _attr_icon = "mdi:speaker"
+    _attr_media_content_type = MediaType.MUSIC
+    _attr_supported_features = (
+        MediaPlayerEntityFeature.PLAY
+        | MediaPlayerEntityFeature.PAUSE
+        | MediaPlayerEntityFeature.STOP
+        | MediaPlayerEntityFeature.NEXT_TRACK
+        | MediaPlayerEntityFeature.PREVIOUS_TRACK
+        | MediaPlayerEntityFeature.SEEK
+        | MediaPlayerEntityFeature.VOLUME_SET
+        | MediaPlayerEntityFeature.PLAY_MEDIA
+        | MediaPlayerEntityFeature.MEDIA_ENQUEUE
+        | MediaPlayerEntityFeature.CLEAR_PLAYLIST
+        | MediaPlayerEntityFeature.SHUFFLE_SET
+        | MediaPlayerEntityFeature.BROWSE_MEDIA
+    )
+
+    def __init__(self, data: SubsonicData, entry: ConfigEntry) -> None:
+        super().__init__(data.jukebox)
+        self.entryData = data
+        self._attr_name = f"{entry.title} jukebox"
+        self._attr_unique_id = f"{entry.entry_id}_jukebox"
+
+    async def async_added_to_hass(self) -> None:
+        await super().async_added_to_hass()
+        # services.play_media ส่งทั้งคิวให้ jukebox ทีเดียวแทนการส่ง URL
+        self.coordinator.entityId = self.entity_id
+
+    @callback
+    def _handle_coordinator_update(self) -> None:
+        # position ใน status นับ ณ เวลาที่ poll
+        self._attr_media_position_updated_at = dt_util.utcnow()
+        super()._handle_coordinator_update()
+
+    async def async_will_remove_from_hass(self) -> None:
+        self.coordinator.entityId = None
+        await super().async_will_remove_from_hass()
+
+    @property
+    def __status(self) -> dict:
+        return self.coordinator.data or {}
+
+    @property
+    def state(self) -> MediaPlayerState:
+        if self.__status.get("playing") == "true":
+            return MediaPlayerState.PLAYING
+
+        if self.coordinator.current is not None:
+            return MediaPlayerState.PAUSED
+
+        return MediaPlayerState.IDLE
+
+    @property
+    def volume_level(self) -> float | None:
+        gain = self.__status.get("gain")
+        return float(gain) if gain is not None else None
+
+    @property
+    def media_content_id(self) -> str | None:
+        current = self.coordinator.current
+        return current.get("id") if current else None
+
+    @property
+    def media_title(self) -> str | None:
+        current = self.coordinator.current
+        return current.get("title") if current else None
+
+    @property
+    def media_artist(self) -> str | None:
+        current = self.coordinator.current
+        return current.get("artist") if current else None
+
+    @property
+    def media_album_name(self) -> str | None:
+        current = self.coordinator.current
+        return current.get("album") if current else None
+
+    @property
+    def media_duration(self) -> int | None:
+        current = self.coordinator.current
+        if not current or not current.get("duration"):
+            return None
+
+        return int(current["duration"])
+
+    @property
+    def media_position(self) -> int | None:
+        position = self.__status.get("position")
+        return int(position) if position is not None else None
+
+    @property
+    def media_image_url(self) -> str | None:
+        current = self.coordinator.current
+        if not current or not current.get("coverArt"):
+            return None
+
+        return self.entryData.api.getCoverArtUrl(current["coverArt"])
+
+    @property
+    def extra_state_attributes(self) -> dict[str, Any]:
+        return {"queue_size": len(self.__status.get("entries", []))}
+
+    def __index(self) -> int:
+        try:
+            return int(self.__status.get("currentIndex", 0))
+        except (TypeError, ValueError):
+            return 0
+
+    async def async_media_play(self) -> None:
+        await self.coordinator.async_control("start")
+
+    async def async_media_pause(self) -> None:
+        await self.coordinator.async_control("stop")
+
+    async def async_media_stop(self) -> None:
+        await self.coordinator.async_control("stop")
+
+    async def async_media_next_track(self) -> None:
+        await self.coordinator.async_control("skip", index=self.__index() + 1)
+
+    async def async_media_previous_track(self) -> None:
+        await self.coordinator.async_control("skip", index=max(self.__index() - 1, 0))
+
+    async def async_media_seek(self, position: float) -> None:
+        await self.coordinator.async_control("skip", index=self.__index(), offset=int(position))
+
+    async def async_set_volume_level(self, volume: float) -> None:
+        await self.coordinator.async_control("setGain", gain=round(volume, 2))
+
+    async def async_clear_playlist(self) -> None:
+        await self.coordinator.async_control("clear", queueChanged=True)
+
+    async def async_set_shuffle(self, shuffle: bool) -> None:
+        if shuffle:
+            await self.coordinator.async_control("shuffle", queueChanged=True)
+
+    async def __async_song_id_pages(
+        self, media_type: str, media_id: str
+    ) -> AsyncIterator[list[str]]:
+        """Yield the song ids to play, a genre page by page."""
+        if media_source.is_media_source_id(media_id):
+            identifier = media_id.partition(f"{DOMAIN}/")[2]
+            kind, _, itemId = identifier.partition("/")
+
+            if kind not in MEDIA_SOURCE_TYPES:
+                raise HomeAssistantError(f"The jukebox cannot play {media_id}")
+
+            media_type, media_id = MEDIA_SOURCE_TYPES[kind], itemId
+
+        elif (songId := getSongIdFromUrl(
+            media_id, self.entryData.api.baseUrls, self.entryData.entry.entry_id
+        )) is not None:
+            yield [songId]
+            return
+
+        if media_type in (MediaType.MUSIC, "music"):
+            media_type = "track"
+
+        api = self.entryData.api
+
+        if media_type in ("genre", "songs_by_genre"):
+            # genre ใหญ่ได้หลายหน้า (async_fetch_tracks ให้แค่หน้าแรก)
+            async for page in api.iterSongsByGenre(media_id):
+                yield [song["id"] for song in page if song.get("id")]
+            return
+
+        tracks = await api.async_fetch_tracks(media_type, media_id)
+        yield [track["id"] for track in tracks if track.get("id")]
+
+    async def async_play_media(
+        self, media_type: str, media_id: str, **kwargs: Any
+    ) -> None:
+        enqueue = kwargs.get("enqueue")
+        replace = enqueue not in (MediaPlayerEnqueue.ADD, MediaPlayerEnqueue.NEXT)
+        played = False
+
+        # หน้าแรกแทนคิว (หรือต่อท้าย) หน้าถัดไปต่อท้ายเสมอ
+        async for ids in self.__async_song_id_pages(media_type, media_id):
+            if not ids:
+                continue
+
+            if replace and not played:
+                await self.coordinator.async_set(ids)
+            else:
+                await self.coordinator.async_add(ids)
+            played = True
+
+        if not played:
+            raise HomeAssistantError(f"Nothing to play for {media_id}")
+
+    async def async_browse_media(
+        self, media_content_type: str | None = None, media_content_id: str | None = None
+    ) -> BrowseMedia:
+        return await media_source.async_browse_media(
+            self.hass,
+            media_content_id,
+            content_filter=lambda item: item.media_content_id.startswith(
+                f"media-source://{DOMAIN}"
+            ),
+        )
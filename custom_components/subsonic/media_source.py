@@ -10,7 +10,17 @@ from homeassistant.components.media_source.models import (
 from homeassistant.config_entries import ConfigEntry
 from homeassistant.core import HomeAssistant, callback
 
-from .const import DOMAIN, LOGGER
+from .const import (
+    CONF_SMART_LISTS,
+    DOMAIN,
+    FOLDER_BROWSE_PAGE_SIZE,
+    GENRE_BROWSE_PAGE_SIZE,
+    LOGGER,
+    SMART_LISTS,
+)
+from .models import SubsonicData
+from .requestScheduler import Priority, withPriority
+from .streamProfiles import resolvePlayerProfile
 from .subsonicApi import SubsonicApi
 from .translation import getTranslation
 
@@ -20,7 +30,6 @@ class SubsonicSource(MediaSource):
         super().__init__(DOMAIN)
         self.hass = hass
         self.entry = entry
-        self.__api = None
         self.name = self.title
 
     @property
@@ -51,27 +60,40 @@ class SubsonicSource(MediaSource):
     def radio(self) -> bool:
         return self.__getOption("radio", False)
 
+    @property
+    def folders(self) -> bool:
+        return self.__getOption("folders", False)
 
     @property
-    def api(self) -> SubsonicApi:
-        """Return SubsonicApi instance for this config entry."""
-        if self.__api is None:
-            domain_data = self.hass.data.get(DOMAIN)
+    def smartLists(self) -> bool:
+        return self.__getOption(CONF_SMART_LISTS, True)
 
-            if not domain_data:
-                raise HomeAssistantError(
-                    f"Subsonic API not initialized for domain '{DOMAIN}'"
-                )
 
-            api = domain_data.get(self.entry.entry_id)
-            if api is None:
-                raise HomeAssistantError(
-                    f"Subsonic API not found for entry_id={self.entry.entry_id}"
-                )
+    @property
+    def data(self) -> SubsonicData:
+        """Return runtime data for this config entry.
+
+        Looked up every time: saving options reloads the entry with new data.
+        """
+        domain_data = self.hass.data.get(DOMAIN)
+
+        if not domain_data:
+            raise HomeAssistantError(
+                f"Subsonic API not initialized for domain '{DOMAIN}'"
+            )
+
+        data = domain_data.get(self.entry.entry_id)
+        if data is None:
+            raise HomeAssistantError(
+                f"Subsonic API not found for entry_id={self.entry.entry_id}"
+            )
 
-            self.__api = api
+        return data
 
-        return self.__api
+    @property
+    def api(self) -> SubsonicApi:
+        """Return SubsonicApi instance for this config entry."""
+        return self.data.api
 
 
     def __getProperty(self, property, dafultValue=None):
@@ -107,7 +129,7 @@ class SubsonicSource(MediaSource):
             return await self.async_resolve_radio(item.identifier)
         
         if item.identifier.startswith("song/"):
-            return await self.async_resolve_song(item.identifier)
+            return await self.async_resolve_song(item.identifier, item.target_media_player)
         
         raise Unresolvable("Can't resolve media item")
     
@@ -121,17 +143,29 @@ class SubsonicSource(MediaSource):
 
         return PlayMedia(radio["streamUrl"], "audio/mpeg")
 
-    async def async_resolve_song(self, identifier: str) -> PlayMedia:
+    @withPriority(Priority.PLAYBACK)
+    async def async_resolve_song(
+        self, identifier: str, targetMediaPlayer: str | None = None
+    ) -> PlayMedia:
         songId = identifier.replace("song/", "")
-        song = await self.api.getSong(songId)
-        #contentType = song["contentType"] if "contentType" in song else "audio/mpeg"
 
-        #streamUrl = self.api.getSongStreamUrl(songId)
+        # เพลงที่เคยเห็นตอน browse มี contentType / suffix / bitRate อยู่แล้ว ไม่ต้องถาม server
+        song = self.api.getCachedSong(songId)
+        if song is None:
+            song = await self.api.getSong(songId)
 
-        #return PlayMedia(streamUrl, contentType)
-        
-        streamUrl = self.api.getSongStreamUrl(songId, audio_format="mp3", max_bitrate=192)
-        return PlayMedia(streamUrl, "audio/mpeg")
+        # format / bitrate ตาม player ที่จะเล่น (ส่งไฟล์ต้นฉบับถ้า player รองรับ)
+        profile = resolvePlayerProfile(
+            self.hass, targetMediaPlayer, self.entry.options, self.api.capabilities
+        )
+        audioFormat, maxBitRate, mimeType = profile.select(song)
+
+        streamUrl = self.data.getSongStreamUrl(songId, audioFormat, maxBitRate)
+
+        if targetMediaPlayer:
+            self.data.scrobbler.watch([targetMediaPlayer])
+
+        return PlayMedia(streamUrl, mimeType)
 
 
 
@@ -139,16 +173,52 @@ class SubsonicSource(MediaSource):
 
         identifier = item.identifier or ""
 
+        # root ขึ้นกับ options อย่างเดียว สร้างใหม่ถูกกว่า
+        if not identifier:
+            return await self.async_browse_root()
+
+        prefetch = self.data.prefetch
+        if prefetch is not None:
+            prefetch.noteBrowsed(identifier)
+
+        node = self.data.browse.get(identifier)
+        if node is None:
+            node = await self.__async_build_node(identifier)
+            self.data.browse.put(identifier, node)
+
+        # เปิด artist แล้ว → เตรียม album ของเขาไว้ล่วงหน้า (ถ้าเปิด option ไว้)
+        if prefetch is not None:
+            prefetch.schedule(identifier, node, self.__async_build_node)
+
+        return node
+
+    async def __async_build_node(self, identifier: str) -> BrowseMediaSource:
         if identifier.startswith("browser/"):
-            return await self.async_browser_item(item.identifier.replace("browser/", ""))
+            return await self.async_browser_item(identifier.replace("browser/", ""))
         elif identifier.startswith("album/"):
             return await self.async_list_songs_album(identifier.replace("album/", ""))
         elif identifier.startswith("playlist/"):
             return await self.async_list_songs_playlist(identifier.replace("playlist/", ""))
         elif identifier.startswith("genre/"):
             return await self.async_list_songs_genre(identifier.replace("genre/", ""))
+        elif identifier.startswith("genrepage/"):
+            # genrepage/{offset}/{genre} (ชื่อ genre อาจมี "/" จึงเอา offset ไว้ก่อน)
+            offset, genreId = identifier.replace("genrepage/", "").split("/", 1)
+            return await self.async_list_songs_genre(genreId, int(offset))
         elif identifier.startswith("artist/"):
             return await self.async_list_albums_artist(identifier.replace("artist/", ""))
+        elif identifier.startswith("folder/"):
+            return await self.async_list_folder(identifier.replace("folder/", ""))
+        elif identifier.startswith("folderpage/"):
+            offset, folderId = identifier.replace("folderpage/", "").split("/", 1)
+            return await self.async_list_folder(folderId, int(offset))
+        elif identifier.startswith("directory/"):
+            return await self.async_list_directory(identifier.replace("directory/", ""))
+        elif identifier.startswith("smartlist/"):
+            return await self.async_list_smart_list(identifier.replace("smartlist/", ""))
+        elif identifier.startswith("directorypage/"):
+            offset, directoryId = identifier.replace("directorypage/", "").split("/", 1)
+            return await self.async_list_directory(directoryId, int(offset))
 
 
         return await self.async_browse_root()
@@ -158,6 +228,20 @@ class SubsonicSource(MediaSource):
         childrens = []
         lang = self.__getTranslation("subsonic")
 
+        if self.smartLists:
+            for kind in SMART_LISTS:
+                childrens.append(
+                    BrowseMediaSource(
+                        domain=DOMAIN,
+                        identifier=f"smartlist/{kind}",
+                        media_class=MediaClass.DIRECTORY,
+                        media_content_type=MediaType.MUSIC,
+                        title=self.__getTranslation(f"smartlist_{kind}"),
+                        can_play=False,
+                        can_expand=True,
+                    )
+                )
+
         if self.artists:
             childrens.append(
                 BrowseMediaSource(
@@ -211,7 +295,6 @@ class SubsonicSource(MediaSource):
                 )
             )
 
-        """
         if self.favorites:
             childrens.append(
                 BrowseMediaSource(
@@ -224,7 +307,19 @@ class SubsonicSource(MediaSource):
                     can_expand=True,
                 )
             )
-        """
+
+        if self.folders:
+            childrens.append(
+                BrowseMediaSource(
+                    domain=DOMAIN,
+                    identifier="browser/folders",
+                    media_class=MediaClass.DIRECTORY,
+                    media_content_type=MediaType.MUSIC,
+                    title=self.__getTranslation("folders"),
+                    can_play=False,
+                    can_expand=True,
+                )
+            )
 
         if self.genres:
             childrens.append(
@@ -278,6 +373,12 @@ class SubsonicSource(MediaSource):
             title = self.__getTranslation("artists")
             childrens = await self.async_list_artists()
             children_type = MediaClass.ARTIST
+        elif identifier == "favorites":
+            title = self.__getTranslation("favorites")
+            childrens = await self.async_list_favorites()
+        elif identifier == "folders":
+            title = self.__getTranslation("folders")
+            childrens = await self.async_list_music_folders()
 
         return BrowseMediaSource(
             domain=DOMAIN,
@@ -337,9 +438,45 @@ class SubsonicSource(MediaSource):
 
         return items
     
+    async def async_list_smart_list(self, kind: str) -> BrowseMediaSource:
+        """Albums of one server ranking, answered from its rolling window."""
+        items: list[BrowseMediaSource] = []
+        albums = await self.data.smartLists.async_get(kind)
+
+        for album in albums:
+            coveart = None
+
+            if album.get("coverArt"):
+                coveart = self.api.getCoverArtUrl(album["coverArt"])
+
+            items.append(
+                BrowseMediaSource(
+                    domain=DOMAIN,
+                    identifier=f"album/{album['id']}",
+                    media_class=MediaClass.ALBUM,
+                    media_content_type=MediaType.ALBUM,
+                    title=album.get("name", album["id"]),
+                    can_play=False,
+                    can_expand=True,
+                    thumbnail=coveart,
+                )
+            )
+
+        return BrowseMediaSource(
+            domain=DOMAIN,
+            identifier=f"smartlist/{kind}",
+            media_class=MediaClass.DIRECTORY,
+            media_content_type=MediaType.MUSIC,
+            title=self.__getTranslation(f"smartlist_{kind}"),
+            can_play=False,
+            can_expand=True,
+            children_media_class=MediaClass.ALBUM,
+            children=items,
+        )
+
     async def async_list_playlists(self) -> list[BrowseMediaSource]:
         items: list[BrowseMediaSource] = []
-        playlists = await self.api.getPlaylists()
+        playlists = await self.data.playlists.async_get_playlists()
 
         for playlist in playlists:
             coveart = None
@@ -364,6 +501,64 @@ class SubsonicSource(MediaSource):
 
         return items
     
+    async def async_list_favorites(self) -> list[BrowseMediaSource]:
+        """Starred artists, albums and songs, answered from the local star cache."""
+        items: list[BrowseMediaSource] = []
+        starred = self.data.starred
+
+        for artist in await starred.async_get("artists"):
+            items.append(
+                BrowseMediaSource(
+                    domain=DOMAIN,
+                    identifier=f"artist/{artist['id']}",
+                    media_class=MediaClass.ARTIST,
+                    media_content_type=MediaType.ARTIST,
+                    title=artist.get("name", artist["id"]),
+                    can_play=False,
+                    can_expand=True,
+                )
+            )
+
+        for album in await starred.async_get("albums"):
+            coveart = None
+
+            if album.get("coverArt"):
+                coveart = self.api.getCoverArtUrl(album["coverArt"])
+
+            items.append(
+                BrowseMediaSource(
+                    domain=DOMAIN,
+                    identifier=f"album/{album['id']}",
+                    media_class=MediaClass.ALBUM,
+                    media_content_type=MediaType.ALBUM,
+                    title=album.get("name", album["id"]),
+                    can_play=False,
+                    can_expand=True,
+                    thumbnail=coveart,
+                )
+            )
+
+        for song in await starred.async_get("songs"):
+            coveart = None
+
+            if song.get("coverArt"):
+                coveart = self.api.getCoverArtUrl(song["coverArt"])
+
+            items.append(
+                BrowseMediaSource(
+                    domain=DOMAIN,
+                    identifier=f"song/{song['id']}",
+                    media_class=MediaClass.MUSIC,
+                    media_content_type=MediaType.MUSIC,
+                    title=song.get("title", song["id"]),
+                    can_play=True,
+                    can_expand=False,
+                    thumbnail=coveart,
+                )
+            )
+
+        return items
+
     async def async_list_genres(self) -> list[BrowseMediaSource]:
         items: list[BrowseMediaSource] = []
         genres = await self.api.getGenres()
@@ -416,15 +611,14 @@ class SubsonicSource(MediaSource):
     async def async_list_songs_album(self, albumId: str) -> list[BrowseMediaSource]:
         items: list[BrowseMediaSource] = []
         album = await self.api.getAlbum(albumId)
+        coveart = None
 
-        for song in album["songs"]:
-            coveart = None
-
-            if ("coverArt" in album
-                and album["coverArt"] is not None
-                and album["coverArt"] != ""):
-                coveart = self.api.getCoverArtUrl(album["coverArt"])
+        if ("coverArt" in album
+            and album["coverArt"] is not None
+            and album["coverArt"] != ""):
+            coveart = self.api.getCoverArtUrl(album["coverArt"])
 
+        for song in album["songs"]:
             items.append(
                 BrowseMediaSource(
                     domain=DOMAIN,
@@ -454,7 +648,7 @@ class SubsonicSource(MediaSource):
     async def async_list_songs_playlist(self, playlistId: str) -> list[BrowseMediaSource]:
         items: list[BrowseMediaSource] = []
 
-        playlist = await self.api.getPlaylist(playlistId)
+        playlist = await self.data.playlists.async_get_playlist(playlistId)
         coveart = None
 
         if ("coverArt" in playlist
@@ -489,10 +683,12 @@ class SubsonicSource(MediaSource):
             children=items,
         )
     
-    async def async_list_songs_genre(self, genreId: str) -> list[BrowseMediaSource]:
+    async def async_list_songs_genre(self, genreId: str, offset: int = 0) -> list[BrowseMediaSource]:
         items: list[BrowseMediaSource] = []
 
-        songs = await self.api.getSongsByGenre(genreId)
+        songs = await self.api.getSongsByGenre(
+            genreId, count=GENRE_BROWSE_PAGE_SIZE, offset=offset
+        )
 
         for song in songs:
             coveart = None
@@ -515,9 +711,23 @@ class SubsonicSource(MediaSource):
                 )
             )
 
+        # หน้าเต็ม → อาจมีหน้าถัดไป
+        if len(songs) == GENRE_BROWSE_PAGE_SIZE:
+            items.append(
+                BrowseMediaSource(
+                    domain=DOMAIN,
+                    identifier=f"genrepage/{offset + GENRE_BROWSE_PAGE_SIZE}/{genreId}",
+                    media_class=MediaClass.DIRECTORY,
+                    media_content_type=MediaType.MUSIC,
+                    title=self.__getTranslation("next_page"),
+                    can_play=False,
+                    can_expand=True,
+                )
+            )
+
         return BrowseMediaSource(
             domain=DOMAIN,
-            identifier=f"genre/{genreId}",
+            identifier=f"genre/{genreId}" if offset == 0 else f"genrepage/{offset}/{genreId}",
             media_class=MediaClass.GENRE,
             media_content_type=MediaType.MUSIC,
             title=genreId,
@@ -572,6 +782,123 @@ class SubsonicSource(MediaSource):
             children=items,
         )
 
+    async def async_list_music_folders(self) -> list[BrowseMediaSource]:
+        items: list[BrowseMediaSource] = []
+        folders = await self.api.getMusicFolders()
+
+        for folder in folders:
+            items.append(
+                BrowseMediaSource(
+                    domain=DOMAIN,
+                    identifier=f"folder/{folder['id']}",
+                    media_class=MediaClass.DIRECTORY,
+                    media_content_type=MediaType.MUSIC,
+                    title=folder.get("name") or folder["id"],
+                    can_play=False,
+                    can_expand=True,
+                )
+            )
+
+        return items
+
+    def __buildEntriesPage(
+        self, entries: list[dict], offset: int, pageIdentifier: str
+    ) -> list[BrowseMediaSource]:
+        """Browse nodes for one page of directory entries (sub directories and songs).
+
+        ``pageIdentifier`` is the identifier of the next page without its
+        offset, e.g. ``directorypage/{offset}/{id}``.
+        """
+        items: list[BrowseMediaSource] = []
+
+        for entry in entries[offset:offset + FOLDER_BROWSE_PAGE_SIZE]:
+            coveart = None
+
+            if entry.get("coverArt"):
+                coveart = self.api.getCoverArtUrl(entry["coverArt"])
+
+            if entry.get("isDir") == "true":
+                items.append(
+                    BrowseMediaSource(
+                        domain=DOMAIN,
+                        identifier=f"directory/{entry['id']}",
+                        media_class=MediaClass.DIRECTORY,
+                        media_content_type=MediaType.MUSIC,
+                        title=entry.get("title") or entry.get("name") or entry["id"],
+                        can_play=False,
+                        can_expand=True,
+                        thumbnail=coveart,
+                    )
+                )
+            else:
+                items.append(
+                    BrowseMediaSource(
+                        domain=DOMAIN,
+                        identifier=f"song/{entry['id']}",
+                        media_class=MediaClass.MUSIC,
+                        media_content_type=MediaType.MUSIC,
+                        title=entry.get("title") or entry["id"],
+                        can_play=True,
+                        can_expand=False,
+                        thumbnail=coveart,
+                    )
+                )
+
+        # directory ใหญ่ → แสดงทีละหน้า
+        nextOffset = offset + FOLDER_BROWSE_PAGE_SIZE
+        if nextOffset < len(entries):
+            items.append(
+                BrowseMediaSource(
+                    domain=DOMAIN,
+                    identifier=pageIdentifier.format(offset=nextOffset),
+                    media_class=MediaClass.DIRECTORY,
+                    media_content_type=MediaType.MUSIC,
+                    title=self.__getTranslation("next_page"),
+                    can_play=False,
+                    can_expand=True,
+                )
+            )
+
+        return items
+
+    async def async_list_folder(self, folderId: str, offset: int = 0) -> BrowseMediaSource:
+        entries = await self.api.getIndexes(folderId)
+
+        return BrowseMediaSource(
+            domain=DOMAIN,
+            identifier=f"folder/{folderId}" if offset == 0 else f"folderpage/{offset}/{folderId}",
+            media_class=MediaClass.DIRECTORY,
+            media_content_type=MediaType.MUSIC,
+            title=self.__getTranslation("folders"),
+            can_play=False,
+            can_expand=True,
+            children_media_class=MediaClass.DIRECTORY,
+            children=self.__buildEntriesPage(
+                entries, offset, "folderpage/{offset}/" + folderId
+            ),
+        )
+
+    async def async_list_directory(self, directoryId: str, offset: int = 0) -> BrowseMediaSource:
+        directory = await self.api.getMusicDirectory(directoryId)
+        entries = directory.get("children", [])
+
+        return BrowseMediaSource(
+            domain=DOMAIN,
+            identifier=(
+                f"directory/{directoryId}" if offset == 0
+                else f"directorypage/{offset}/{directoryId}"
+            ),
+            media_class=MediaClass.DIRECTORY,
+            media_content_type=MediaType.MUSIC,
+            title=directory.get("name") or directoryId,
+            can_play=False,
+            can_expand=True,
+            children_media_class=MediaClass.DIRECTORY,
+            children=self.__buildEntriesPage(
+                entries, offset, "directorypage/{offset}/" + directoryId
+            ),
+        )
+
 
 async def async_get_media_source(hass: HomeAssistant) -> SubsonicSource | None:
     """Return Subsonic media source instance (if configured)."""
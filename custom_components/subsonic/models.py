@@ -0,0 +1,53 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+
+from homeassistant.config_entries import ConfigEntry
+
+from .browseCache import BrowseCache
+from .jukebox import JukeboxCoordinator
+from .library import LibraryCache
+from .nowPlaying import NowPlayingCoordinator
+from .playlistCache import PlaylistCache
+from .prefetch import Prefetcher
+from .radio import RadioManager
+from .recentAlbums import RecentAlbumsCoordinator
+from .scrobbler import Scrobbler
+from .smartLists import SmartLists
+from .starredCache import StarredCache
+from .streamProfiles import HLS_FORMAT, getHlsLadder
+from .streamRelay import CONF_STREAM_RELAY, StreamRelay
+from .subsonicApi import SubsonicApi
+
+
+@dataclass
+class SubsonicData:
+    """Runtime objects of a Subsonic config entry, kept in hass.data."""
+
+    entry: ConfigEntry
+    api: SubsonicApi
+    playlists: PlaylistCache
+    recent: RecentAlbumsCoordinator
+    library: LibraryCache
+    starred: StarredCache
+    nowPlaying: NowPlayingCoordinator
+    browse: BrowseCache
+    smartLists: SmartLists
+    relay: StreamRelay | None = None
+    radio: RadioManager | None = None
+    scrobbler: Scrobbler | None = None
+    prefetch: Prefetcher | None = None
+    jukebox: JukeboxCoordinator | None = None
+
+    def getSongStreamUrl(
+        self, id: str, audio_format: str | None = None, max_bitrate: int | None = None
+    ) -> str:
+        """Return the URL players should stream a song from."""
+        if audio_format == HLS_FORMAT:
+            # segment ใน playlist ชี้ไปที่ server ตรงๆ → relay ผ่าน HA ไม่ได้
+            return self.api.getSongHlsUrl(id, getHlsLadder(self.entry.options, max_bitrate))
+
+        if self.relay is not None and self.entry.options.get(CONF_STREAM_RELAY, False):
+            return self.relay.getSongStreamUrl(id, audio_format, max_bitrate)
+
+        return self.api.getSongStreamUrl(id, audio_format, max_bitrate)
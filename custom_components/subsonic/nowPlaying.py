@@ -0,0 +1,79 @@
+from __future__ import annotations
+
+from datetime import timedelta
+from typing import Any
+
+from homeassistant.core import CALLBACK_TYPE, HomeAssistant, callback
+from homeassistant.helpers.update_coordinator import DataUpdateCoordinator, UpdateFailed
+
+from .const import LOGGER
+from .requestScheduler import Priority, withPriority
+from .subsonicApi import SubsonicApi
+
+ACTIVE_INTERVAL = timedelta(seconds=15)
+# idle polling starts here and doubles after every empty answer
+IDLE_INTERVAL = timedelta(minutes=1)
+# slowest idle pace, so playback from other clients is still noticed
+MAX_IDLE_INTERVAL = timedelta(minutes=30)
+
+
+class NowPlayingCoordinator(DataUpdateCoordinator[list[dict]]):
+    """Poll ``getNowPlaying`` at a pace that follows server activity.
+
+    The interval is short while someone is listening and backs off while
+    the server is idle, down to one request every ``MAX_IDLE_INTERVAL``. A
+    coordinator only polls while it has listeners, so with the sensor
+    disabled no request is made at all. ``poke`` brings it back to the short
+    interval when a local player starts a Subsonic song.
+    """
+
+    def __init__(self, hass: HomeAssistant, api: SubsonicApi) -> None:
+        super().__init__(
+            hass,
+            LOGGER,
+            name="Subsonic now playing",
+            update_interval=ACTIVE_INTERVAL,
+        )
+        self.api = api
+        self.__consumers = 0
+
+    @callback
+    def async_add_listener(
+        self, update_callback: CALLBACK_TYPE, context: Any = None
+    ) -> CALLBACK_TYPE:
+        remove = super().async_add_listener(update_callback, context)
+        self.__consumers += 1
+
+        @callback
+        def remove_listener() -> None:
+            self.__consumers -= 1
+            remove()
+
+        return remove_listener
+
+    @withPriority(Priority.BACKGROUND)
+    async def _async_update_data(self) -> list[dict]:
+        try:
+            entries = await self.api.getNowPlaying()
+        except Exception as err:
+            raise UpdateFailed(f"Error fetching now playing: {err}") from err
+
+        interval = self.update_interval
+
+        if entries:
+            self.update_interval = ACTIVE_INTERVAL
+        elif interval < IDLE_INTERVAL:
+            self.update_interval = IDLE_INTERVAL
+        else:
+            self.update_interval = min(interval * 2, MAX_IDLE_INTERVAL)
+
+        return entries
+
+    @callback
+    def poke(self) -> None:
+        """Something started playing: poll soon and at the active pace again."""
+        if self.update_interval == ACTIVE_INTERVAL or not self.__consumers:
+            return
+
+        self.update_interval = ACTIVE_INTERVAL
+        self.hass.async_create_task(self.async_request_refresh())
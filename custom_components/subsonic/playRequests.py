@@ -0,0 +1,59 @@
+from __future__ import annotations
+
+import asyncio
+import itertools
+from collections import defaultdict
+from contextlib import AsyncExitStack, asynccontextmanager
+from typing import AsyncIterator, Iterable
+
+from .const import LOGGER
+
+
+class PlayRequests:
+    """The latest play request of every media_player.
+
+    Every request gets a sequence number and becomes the latest one for its
+    targets. A resolution still running for an older request is cancelled
+    once none of its targets is waiting for it any more, and dispatching
+    holds a per-player lock and only plays on the players a request is still
+    the latest for, so the last request always wins.
+    """
+
+    def __init__(self) -> None:
+        self.__sequence = itertools.count(1)
+        self.__latest: dict[str, int] = {}
+        self.__pending: dict[int, tuple[frozenset[str], asyncio.Task]] = {}
+        self.__locks: defaultdict[str, asyncio.Lock] = defaultdict(asyncio.Lock)
+
+    def begin(self, entityIds: Iterable[str]) -> int:
+        """Start a request on ``entityIds``, superseding older ones there."""
+        sequence = next(self.__sequence)
+
+        for entityId in entityIds:
+            self.__latest[entityId] = sequence
+
+        for older, (targets, task) in list(self.__pending.items()):
+            if not self.current(older, targets):
+                LOGGER.debug("Play request %d superseded by %d, cancelling", older, sequence)
+                del self.__pending[older]
+                task.cancel()
+
+        return sequence
+
+    def track(self, sequence: int, entityIds: Iterable[str], task: asyncio.Task) -> None:
+        """Remember the work of a request so a newer one can cancel it."""
+        self.__pending[sequence] = (frozenset(entityIds), task)
+        task.add_done_callback(lambda _task: self.__pending.pop(sequence, None))
+
+    def current(self, sequence: int, entityIds: Iterable[str]) -> list[str]:
+        """Return the players ``sequence`` is still the latest request for."""
+        return [e for e in entityIds if self.__latest.get(e) == sequence]
+
+    @asynccontextmanager
+    async def dispatching(self, entityIds: Iterable[str]) -> AsyncIterator[None]:
+        """Hold the dispatch lock of every player (in a fixed order)."""
+        async with AsyncExitStack() as stack:
+            for entityId in sorted(set(entityIds)):
+                await stack.enter_async_context(self.__locks[entityId])
+
+            yield
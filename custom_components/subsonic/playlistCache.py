@@ -0,0 +1,128 @@
+from __future__ import annotations
+
+import asyncio
+from typing import Callable, Iterable
+
+from homeassistant.core import HomeAssistant
+from homeassistant.helpers.storage import Store
+
+from .const import DOMAIN, LOGGER, STORAGE_VERSION
+from .subsonicApi import SubsonicApi
+
+SAVE_DELAY = 30
+
+
+class PlaylistCache:
+    """Playlist contents kept in sync with the server.
+
+    ``getPlaylists`` is cheap and carries ``changed``/``songCount`` for every
+    playlist, so only playlists whose markers moved are fetched again with
+    ``getPlaylist``.
+    """
+
+    def __init__(self, hass: HomeAssistant, api: SubsonicApi, entryId: str) -> None:
+        self.api = api
+        self.__store = Store(hass, STORAGE_VERSION, f"{DOMAIN}.{entryId}.playlists")
+        self.__playlists: dict[str, dict] = {}
+        self.__lock = asyncio.Lock()
+        # called with the ids of playlists that changed or were removed
+        self.onChange: Callable[[Iterable[str]], None] | None = None
+
+    async def async_load(self) -> None:
+        """Restore the cache saved by a previous run."""
+        stored = await self.__store.async_load()
+
+        if stored and "playlists" in stored:
+            self.__playlists = stored["playlists"]
+
+            for playlist in self.__playlists.values():
+                self.api.rememberSongs(playlist.get("songs", []))
+
+    def __dataToSave(self) -> dict:
+        return {"playlists": self.__playlists}
+
+    def __save(self) -> None:
+        self.__store.async_delay_save(self.__dataToSave, SAVE_DELAY)
+
+    @staticmethod
+    def __isStale(cached: dict, summary: dict) -> bool:
+        for marker in ("changed", "songCount"):
+            if summary.get(marker) != cached.get(marker):
+                return True
+
+        return False
+
+    async def async_refresh(self, fetchChanged: bool = True) -> list[str]:
+        """Compare the server playlist list against the cache.
+
+        With ``fetchChanged`` the contents of new/changed playlists are fetched
+        right away, otherwise they are only marked stale and fetched the next
+        time they are opened. Returns the ids of playlists whose contents were
+        (or must be) fetched again.
+        """
+        async with self.__lock:
+            summaries = await self.api.getPlaylists()
+
+            current: dict[str, dict] = {}
+            changed: list[str] = []
+
+            for summary in summaries:
+                playlistId = summary.get("id")
+                if not playlistId:
+                    continue
+
+                cached = self.__playlists.get(playlistId)
+
+                if (cached is not None
+                    and "songs" in cached
+                    and not self.__isStale(cached, summary)):
+                    current[playlistId] = {**summary, "songs": cached["songs"]}
+                    continue
+
+                changed.append(playlistId)
+
+                if not fetchChanged:
+                    current[playlistId] = dict(summary)
+                    continue
+
+                try:
+                    current[playlistId] = await self.api.getPlaylist(playlistId)
+                except Exception as err:
+                    LOGGER.warning("Could not fetch playlist %s: %s", playlistId, err)
+                    current[playlistId] = dict(summary)
+
+            removed = set(self.__playlists) - set(current)
+            self.__playlists = current
+
+            if changed or removed:
+                LOGGER.debug(
+                    "Playlist sync: %d changed, %d removed", len(changed), len(removed)
+                )
+                self.__save()
+
+                if self.onChange is not None:
+                    self.onChange([*changed, *removed])
+
+            return changed
+
+    async def async_get_playlists(self) -> list[dict]:
+        """Return playlist summaries, marking changed playlists as stale."""
+        await self.async_refresh(fetchChanged=False)
+
+        return [
+            {k: v for k, v in playlist.items() if k != "songs"}
+            for playlist in self.__playlists.values()
+        ]
+
+    async def async_get_playlist(self, id: str) -> dict:
+        """Return a playlist with its songs, fetching it only when not cached."""
+        cached = self.__playlists.get(id)
+
+        if cached is not None and "songs" in cached:
+            return cached
+
+        playlist = await self.api.getPlaylist(id)
+        self.__playlists[id] = playlist
+        self.__save()
+
+        return playlist
@@ -0,0 +1,130 @@
+from __future__ import annotations
+
+import asyncio
+import time
+from collections import OrderedDict, deque
+from typing import Awaitable, Callable, Iterable
+
+from homeassistant.components.media_source.models import BrowseMediaSource
+from homeassistant.core import HomeAssistant
+
+from .browseCache import BrowseCache
+from .const import LOGGER
+from .requestScheduler import Priority, withPriority
+
+CONF_PREFETCH = "prefetch"
+
+CONCURRENCY = 2
+# at most this many prefetches per window, however much is browsed
+BUDGET = 40
+BUDGET_WINDOW = 600
+# prefetched nodes remembered for hit counting
+TRACKED = 200
+# children prefetched below one browsed node
+CHILD_LIMITS = {
+    "artist": 12,
+    "browser/playlist": 5,
+}
+
+NodeBuilder = Callable[[str], Awaitable[BrowseMediaSource]]
+
+
+def _childLimit(identifier: str) -> int:
+    if identifier in CHILD_LIMITS:
+        return CHILD_LIMITS[identifier]
+
+    return CHILD_LIMITS.get(identifier.partition("/")[0], 0)
+
+
+class Prefetcher:
+    """Build the browse nodes a user is likely to open next.
+
+    When an artist page is shown its albums are built in the background,
+    and the same for the first playlists of the playlist list, straight into
+    the browse cache. Work is limited to ``CONCURRENCY`` requests at a time
+    and ``BUDGET`` nodes per ``BUDGET_WINDOW``; hits are counted so the
+    debug log shows whether it pays off.
+    """
+
+    def __init__(self, hass: HomeAssistant, browse: BrowseCache) -> None:
+        self.hass = hass
+        self.browse = browse
+        self.__slots = asyncio.Semaphore(CONCURRENCY)
+        self.__spent: deque[float] = deque()
+        self.__waiting: set[str] = set()
+        self.__prefetched: OrderedDict[str, None] = OrderedDict()
+        self.issued = 0
+        self.hits = 0
+
+    def __takeBudget(self) -> bool:
+        now = time.monotonic()
+        while self.__spent and now - self.__spent[0] > BUDGET_WINDOW:
+            self.__spent.popleft()
+
+        if len(self.__spent) >= BUDGET:
+            return False
+
+        self.__spent.append(now)
+        return True
+
+    def noteBrowsed(self, identifier: str) -> None:
+        """Count a hit when a prefetched node is opened."""
+        if identifier in self.__prefetched:
+            del self.__prefetched[identifier]
+            self.hits += 1
+
+            LOGGER.debug(
+                "Prefetch hit %s (%d/%d = %.0f%%)",
+                identifier,
+                self.hits,
+                self.issued,
+                100 * self.hits / self.issued,
+            )
+
+    def schedule(self, identifier: str, node: BrowseMediaSource, build: NodeBuilder) -> None:
+        """Prefetch the likely next levels below a node that was just shown.
+
+        ``build`` builds the node of an identifier, as browsing would.
+        """
+        limit = _childLimit(identifier)
+        if not limit or not node.children:
+            return
+
+        candidates: Iterable[str] = (
+            child.identifier
+            for child in node.children[:limit]
+            if child.can_expand and child.identifier
+        )
+
+        for childId in candidates:
+            if childId in self.browse or childId in self.__waiting:
+                continue
+
+            if not self.__takeBudget():
+                LOGGER.debug("Prefetch budget used up, skipping the rest")
+                return
+
+            self.__waiting.add(childId)
+            self.hass.async_create_background_task(
+                self.__async_prefetch(childId, build), f"subsonic_prefetch_{childId}"
+            )
+
+    @withPriority(Priority.BACKGROUND)
+    async def __async_prefetch(self, identifier: str, build: NodeBuilder) -> None:
+        try:
+            async with self.__slots:
+                # อาจถูกเปิดไปแล้วระหว่างรอ slot
+                if identifier in self.browse:
+                    return
+
+                node = await build(identifier)
+                self.browse.put(identifier, node)
+                self.issued += 1
+
+                self.__prefetched[identifier] = None
+                while len(self.__prefetched) > TRACKED:
+                    self.__prefetched.popitem(last=False)
+        except Exception as err:
+            LOGGER.debug("Prefetch of %s failed: %s", identifier, err)
+        finally:
+            self.__waiting.discard(identifier)
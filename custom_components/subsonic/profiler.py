@@ -0,0 +1,60 @@
+from __future__ import annotations
+
+import asyncio
+import cProfile
+import io
+import os
+import pstats
+import re
+from datetime import datetime
+
+from homeassistant.core import HomeAssistant
+
+from .const import LOGGER
+
+MAX_DURATION = 600
+# only functions from this integration end up in the logged summary
+_PACKAGE_DIR = re.escape(os.path.dirname(__file__))
+
+_running = asyncio.Lock()
+
+
+def _writeProfile(profile: cProfile.Profile, path: str, top: int) -> str:
+    profile.dump_stats(path)
+
+    out = io.StringIO()
+    stats = pstats.Stats(profile, stream=out)
+    stats.sort_stats(pstats.SortKey.CUMULATIVE).print_stats(_PACKAGE_DIR, top)
+
+    return out.getvalue()
+
+
+async def async_profile(hass: HomeAssistant, duration: float, top: int = 20) -> str:
+    """Profile the event loop thread for ``duration`` seconds.
+
+    Everything running on the loop is recorded (requests, XML parsing, browse
+    node building). The full stats go to ``subsonic_profile_<time>.prof`` in
+    the config dir, readable with pstats, snakeviz or flameprof; the ``top``
+    slowest integration functions are logged. Returns the file path.
+    """
+    if _running.locked():
+        raise RuntimeError("A Subsonic profile is already running")
+
+    async with _running:
+        path = hass.config.path(
+            f"subsonic_profile_{datetime.now().strftime('%Y%m%d_%H%M%S')}.prof"
+        )
+        profile = cProfile.Profile()
+        duration = min(duration, MAX_DURATION)
+
+        LOGGER.info("Profiling for %g seconds", duration)
+        profile.enable()
+        try:
+            await asyncio.sleep(duration)
+        finally:
+            profile.disable()
+
+        summary = await hass.async_add_executor_job(_writeProfile, profile, path, top)
+
+    LOGGER.info("Profile written to %s\n%s", path, summary)
+    return path
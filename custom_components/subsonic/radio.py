@@ -0,0 +1,370 @@
+from __future__ import annotations
+
+import asyncio
+import random
+from collections import deque
+from typing import TYPE_CHECKING, AsyncIterator, Awaitable, Callable
+
+from homeassistant.components.media_player import (
+    ATTR_MEDIA_CONTENT_ID,
+    ATTR_MEDIA_ENQUEUE,
+    DOMAIN as MP_DOMAIN,
+    MediaPlayerEnqueue,
+    MediaPlayerEntityFeature,
+)
+from homeassistant.const import (
+    ATTR_ENTITY_ID,
+    ATTR_SUPPORTED_FEATURES,
+    STATE_BUFFERING,
+    STATE_IDLE,
+    STATE_PAUSED,
+    STATE_PLAYING,
+)
+from homeassistant.core import Event, HomeAssistant, callback
+from homeassistant.helpers.event import async_track_state_change_event
+
+from .const import DOMAIN, LOGGER
+from .requestScheduler import Priority, withPriority
+from .streamProfiles import resolvePlayerProfile
+
+if TYPE_CHECKING:
+    from .models import SubsonicData
+
+FIRST_BATCH_SIZE = 10
+BATCH_SIZE = 5
+# top up once this many tracks (or fewer) are left in the queue
+LOW_WATERMARK = 2
+HISTORY_SIZE = 200
+
+BatchSource = Callable[[int], Awaitable[list[dict]]]
+# builds a fresh source for every player, since sources keep state
+# (pages handed out, fallbacks) and each player plays at its own pace
+SourceFactory = Callable[[], BatchSource]
+
+# player ที่กำลังเล่นอยู่ → enqueue ต้องรอต่อท้าย ไม่ใช่เริ่มเล่นทันที
+BUSY_STATES = (STATE_PLAYING, STATE_PAUSED, STATE_BUFFERING)
+
+
+def listSource(songs: list[dict]) -> BatchSource:
+    """Hand out a fixed list of songs in order, then end."""
+    remaining = list(songs)
+
+    async def async_next_batch(size: int) -> list[dict]:
+        batch = remaining[:size]
+        del remaining[:size]
+
+        return batch
+
+    return async_next_batch
+
+
+def pagedSource(pages: AsyncIterator[list[dict]], shuffle: bool = False) -> BatchSource:
+    """Turn pages of songs into a batch source that ends with the last page.
+
+    The next page is only requested once the songs of the previous one have
+    been handed out, so playback starts after the first page. ``shuffle``
+    shuffles each page on its own.
+    """
+    buffer: list[dict] = []
+
+    async def async_next_batch(size: int) -> list[dict]:
+        while len(buffer) < size:
+            page = await anext(pages, None)
+            if page is None:
+                break
+
+            page = list(page)
+            if shuffle:
+                random.shuffle(page)
+            buffer.extend(page)
+
+        batch = buffer[:size]
+        del buffer[:size]
+
+        return batch
+
+    return async_next_batch
+
+
+def chainSources(*sources: BatchSource) -> BatchSource:
+    """Hand out the songs of each source in turn, moving on when one ends."""
+    remaining = list(sources)
+
+    async def async_next_batch(size: int) -> list[dict]:
+        batch: list[dict] = []
+
+        while remaining and len(batch) < size:
+            songs = await remaining[0](size - len(batch))
+            if len(songs) < size - len(batch):
+                # source นี้หมดแล้ว
+                remaining.pop(0)
+            batch.extend(songs)
+
+        return batch
+
+    return async_next_batch
+
+
+class RadioSession:
+    """Endless playback on one media_player, topped up in small batches.
+
+    Players that support enqueueing get the batch added to their own queue;
+    the others get the next track when they turn idle. A finite source
+    (a long list, the pages of a genre) simply ends the session.
+    """
+
+    def __init__(
+        self,
+        hass: HomeAssistant,
+        entryData: SubsonicData,
+        entityId: str,
+        source: BatchSource,
+        onStop: Callable[[RadioSession], None],
+    ) -> None:
+        self.hass = hass
+        self.entryData = entryData
+        self.entityId = entityId
+        self.__source = source
+        self.__onStop = onStop
+        self.__queued: list[str] = []
+        self.__pending: list[dict] = []
+        self.__history: deque[str] = deque(maxlen=HISTORY_SIZE)
+        self.__current: str | None = None
+        self.__topUp: asyncio.Task | None = None
+        self.__unsub: Callable[[], None] | None = None
+        self.__stopped = False
+        # enqueue: เพลงเดิมของ player ยังเล่นอยู่ ยังไม่ถึงเพลงของเรา
+        self.__waiting = False
+
+    @property
+    def supportsEnqueue(self) -> bool:
+        state = self.hass.states.get(self.entityId)
+        if state is None:
+            return False
+
+        features = state.attributes.get(ATTR_SUPPORTED_FEATURES, 0)
+        return bool(features & MediaPlayerEntityFeature.MEDIA_ENQUEUE)
+
+    @withPriority(Priority.PLAYBACK)
+    async def __async_next_batch(self, size: int) -> list[dict]:
+        songs = await self.__source(size)
+        songs = [s for s in songs if s.get("id") and s["id"] not in self.__history]
+
+        for song in songs:
+            self.__history.append(song["id"])
+
+        profile = resolvePlayerProfile(
+            self.hass, self.entityId, self.entryData.entry.options, self.entryData.api.capabilities
+        )
+        return self.entryData.api.prepareTracks(
+            songs, profile=profile, streamUrl=self.entryData.getSongStreamUrl
+        )
+
+    async def __async_play(self, track: dict, enqueue: MediaPlayerEnqueue | None) -> None:
+        serviceData = {
+            ATTR_ENTITY_ID: self.entityId,
+            "media_content_id": track["stream_url"],
+            "media_content_type": track["mime_type"],
+        }
+        if enqueue is not None:
+            serviceData[ATTR_MEDIA_ENQUEUE] = enqueue
+
+        self.__queued.append(track["stream_url"])
+        await self.hass.services.async_call(MP_DOMAIN, "play_media", serviceData, blocking=True)
+
+    async def async_start(self, playing: str | None = None, enqueue: bool = False) -> bool:
+        """Start playback with one small batch, return False if nothing to play.
+
+        ``playing`` is a stream URL the caller already started on the
+        player; the batch then follows it. With ``enqueue`` the batch goes
+        after what a busy player is playing instead of replacing it.
+
+        The session may be stopped while waiting (another play request took
+        the player over); it then plays nothing more and returns False.
+        """
+        tracks = await self.__async_next_batch(FIRST_BATCH_SIZE)
+        if not tracks or self.__stopped:
+            return False
+
+        canEnqueue = self.supportsEnqueue
+        state = self.hass.states.get(self.entityId)
+
+        if playing is not None:
+            self.__current = playing
+            self.__queued.append(playing)
+        elif enqueue and state is not None and state.state in BUSY_STATES:
+            self.__current = state.attributes.get(ATTR_MEDIA_CONTENT_ID)
+            self.__waiting = True
+        else:
+            first, tracks = tracks[0], tracks[1:]
+
+            self.__current = first["stream_url"]
+            await self.__async_play(first, MediaPlayerEnqueue.REPLACE if canEnqueue else None)
+            if self.__stopped:
+                return False
+
+        if canEnqueue:
+            await self.__async_add(tracks)
+            if self.__stopped:
+                return False
+        else:
+            self.__pending = tracks
+
+        self.__unsub = async_track_state_change_event(
+            self.hass, [self.entityId], self.__stateChanged
+        )
+        return True
+
+    async def __async_add(self, tracks: list[dict]) -> None:
+        for track in tracks:
+            if self.__stopped:
+                return
+
+            await self.__async_play(track, MediaPlayerEnqueue.ADD)
+
+    def __remaining(self) -> int:
+        if not self.supportsEnqueue:
+            return len(self.__pending)
+
+        if self.__current not in self.__queued:
+            return len(self.__queued)
+
+        return len(self.__queued) - self.__queued.index(self.__current) - 1
+
+    @staticmethod
+    def __isOurs(contentId: str) -> bool:
+        return (
+            "stream.view" in contentId
+            or "hls.m3u8" in contentId
+            or f"/api/{DOMAIN}/stream/" in contentId
+        )
+
+    @callback
+    def __stateChanged(self, event: Event) -> None:
+        newState = event.data.get("new_state")
+        if newState is None:
+            self.stop()
+            return
+
+        contentId = newState.attributes.get(ATTR_MEDIA_CONTENT_ID)
+
+        if contentId and contentId != self.__current:
+            if contentId in self.__queued or self.__isOurs(contentId):
+                self.__waiting = False
+            elif not self.__waiting:
+                # มีคนสั่งเล่นอย่างอื่นบน player นี้แล้ว → หยุด radio
+                LOGGER.debug("Radio on %s stopped by other media", self.entityId)
+                self.stop()
+                return
+
+            self.__current = contentId
+
+        if newState.state == STATE_IDLE and self.__pending and not self.supportsEnqueue:
+            track = self.__pending.pop(0)
+            self.__current = track["stream_url"]
+            self.hass.async_create_task(self.__async_play(track, None))
+
+        if self.__remaining() <= LOW_WATERMARK and (self.__topUp is None or self.__topUp.done()):
+            self.__topUp = self.hass.async_create_task(self.__async_top_up())
+
+    async def __async_top_up(self) -> None:
+        try:
+            tracks = await self.__async_next_batch(BATCH_SIZE)
+        except Exception as err:
+            LOGGER.warning("Radio on %s could not fetch more songs: %s", self.entityId, err)
+            return
+
+        if self.__stopped:
+            return
+
+        if not tracks:
+            LOGGER.debug("Radio on %s ran out of new songs", self.entityId)
+            return
+
+        if self.supportsEnqueue:
+            await self.__async_add(tracks)
+        else:
+            self.__pending.extend(tracks)
+
+    @callback
+    def stop(self) -> None:
+        if self.__stopped:
+            return
+
+        self.__stopped = True
+
+        if self.__unsub is not None:
+            self.__unsub()
+            self.__unsub = None
+
+        if self.__topUp is not None and not self.__topUp.done():
+            self.__topUp.cancel()
+
+        self.__onStop(self)
+
+
+class RadioManager:
+    """Radio sessions of a config entry, at most one per media_player."""
+
+    def __init__(self, hass: HomeAssistant, entryData: SubsonicData) -> None:
+        self.hass = hass
+        self.entryData = entryData
+        self.__sessions: dict[str, RadioSession] = {}
+
+    @callback
+    def __forget(self, session: RadioSession) -> None:
+        if self.__sessions.get(session.entityId) is session:
+            del self.__sessions[session.entityId]
+
+    async def __async_start_session(
+        self,
+        entityId: str,
+        source: BatchSource,
+        playing: str | None = None,
+        enqueue: bool = False,
+    ) -> None:
+        self.stop(entityId)
+
+        session = RadioSession(self.hass, self.entryData, entityId, source, self.__forget)
+        self.__sessions[entityId] = session
+
+        started = False
+        try:
+            started = await session.async_start(playing, enqueue)
+        except Exception as err:
+            LOGGER.error("Could not start radio on %s: %s", entityId, err)
+        finally:
+            # ไม่มีเพลง, error หรือถูกยกเลิกกลางทาง → อย่าให้ session ค้างอยู่
+            if not started:
+                session.stop()
+
+    async def async_start(
+        self, entityIds: list[str], sourceFactory: SourceFactory, enqueue: bool = False
+    ) -> None:
+        """Start a radio on every entity, replacing radios already running there.
+
+        Every entity gets its own source from ``sourceFactory``. With
+        ``enqueue`` a busy player finishes what it is playing first.
+        """
+        self.entryData.scrobbler.watch(entityIds)
+        await asyncio.gather(
+            *(
+                self.__async_start_session(entityId, sourceFactory(), enqueue=enqueue)
+                for entityId in entityIds
+            )
+        )
+
+    async def async_continue(self, entityId: str, playing: str, source: BatchSource) -> None:
+        """Play ``source`` after ``playing``, which the caller already started."""
+        await self.__async_start_session(entityId, source, playing=playing)
+
+    @callback
+    def stop(self, entityId: str) -> None:
+        session = self.__sessions.get(entityId)
+        if session is not None:
+            session.stop()
+
+    @callback
+    def stopAll(self) -> None:
+        for session in list(self.__sessions.values()):
+            session.stop()
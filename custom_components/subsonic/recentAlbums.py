@@ -0,0 +1,87 @@
+from __future__ import annotations
+
+from homeassistant.core import HomeAssistant
+from homeassistant.helpers.storage import Store
+from homeassistant.helpers.update_coordinator import DataUpdateCoordinator, UpdateFailed
+
+from .const import (
+    DOMAIN,
+    EVENT_NEW_ALBUM,
+    LOGGER,
+    RECENT_SYNC_INTERVAL,
+    STORAGE_VERSION,
+)
+from .requestScheduler import Priority, withPriority
+from .subsonicApi import SubsonicApi
+
+PAGE_SIZE = 10
+MAX_PAGES = 10
+RECENT_LIMIT = 20
+SEEN_LIMIT = 500
+
+
+class RecentAlbumsCoordinator(DataUpdateCoordinator[list[dict]]):
+    """Track recently added albums through ``getAlbumList2 type=newest``.
+
+    Paging stops at the first album that was already seen, so once the
+    tracker is seeded an interval without new music costs one small request.
+    """
+
+    def __init__(self, hass: HomeAssistant, api: SubsonicApi, entryId: str) -> None:
+        super().__init__(
+            hass,
+            LOGGER,
+            name="Subsonic recently added",
+            update_interval=RECENT_SYNC_INTERVAL,
+        )
+        self.api = api
+        self.__store = Store(hass, STORAGE_VERSION, f"{DOMAIN}.{entryId}.recent")
+        self.__seen: list[str] = []
+        self.__recent: list[dict] = []
+
+    async def async_load(self) -> None:
+        """Restore seen albums saved by a previous run."""
+        stored = await self.__store.async_load()
+
+        if stored:
+            self.__seen = stored.get("seen", [])
+            self.__recent = stored.get("recent", [])
+
+    @withPriority(Priority.BACKGROUND)
+    async def _async_update_data(self) -> list[dict]:
+        seen = set(self.__seen)
+        seeding = not seen
+        newAlbums: list[dict] = []
+
+        try:
+            for page in range(MAX_PAGES):
+                albums = await self.api.getAlbumList(
+                    "newest", size=PAGE_SIZE, offset=page * PAGE_SIZE
+                )
+
+                reachedSeen = False
+                for album in albums:
+                    if album.get("id") in seen:
+                        reachedSeen = True
+                        break
+                    newAlbums.append(album)
+
+                # ครั้งแรกไม่มีอะไรให้เทียบ → เก็บแค่หน้าแรกเป็นจุดเริ่มต้น
+                if reachedSeen or seeding or len(albums) < PAGE_SIZE:
+                    break
+        except Exception as err:
+            raise UpdateFailed(f"Error fetching newest albums: {err}") from err
+
+        if not newAlbums:
+            return self.__recent
+
+        if not seeding:
+            for album in reversed(newAlbums):
+                LOGGER.debug("New album: %s (%s)", album.get("name"), album.get("id"))
+                self.hass.bus.async_fire(EVENT_NEW_ALBUM, dict(album))
+
+        self.__seen = ([a["id"] for a in newAlbums if a.get("id")] + self.__seen)[:SEEN_LIMIT]
+        self.__recent = (newAlbums + self.__recent)[:RECENT_LIMIT]
+        await self.__store.async_save({"seen": self.__seen, "recent": self.__recent})
+
+        return self.__recent
@@ -0,0 +1,125 @@
+from __future__ import annotations
+
+import asyncio
+import time
+from contextlib import asynccontextmanager, contextmanager
+from contextvars import ContextVar
+from enum import IntEnum
+from functools import wraps
+from typing import AsyncIterator, Awaitable, Callable, Iterator, ParamSpec, TypeVar
+
+from .const import LOGGER
+
+
+class Priority(IntEnum):
+    INTERACTIVE = 0  # media browser, websocket queries
+    PLAYBACK = 1  # resolving what a player is about to play
+    BACKGROUND = 2  # syncs, cache warm-up, scrobbles
+
+
+# ค่า priority ติดไปกับ task (รวมถึง task ลูกที่สร้างภายใน) ไม่ต้องส่งผ่านทุก method
+_priority: ContextVar[Priority] = ContextVar("subsonic_request_priority", default=Priority.INTERACTIVE)
+
+BUDGETS = {
+    Priority.INTERACTIVE: 4,
+    Priority.PLAYBACK: 4,
+    Priority.BACKGROUND: 2,
+}
+# an interactive request slower than this holds background work back for
+# as long as it took
+SLOW_INTERACTIVE = 0.5
+MAX_HOLD = 10.0
+
+
+@contextmanager
+def requestPriority(priority: Priority) -> Iterator[None]:
+    """Run the requests made inside the block (and tasks it starts) at ``priority``."""
+    token = _priority.set(priority)
+    try:
+        yield
+    finally:
+        _priority.reset(token)
+
+
+_P = ParamSpec("_P")
+_R = TypeVar("_R")
+
+
+def withPriority(
+    priority: Priority,
+) -> Callable[[Callable[_P, Awaitable[_R]]], Callable[_P, Awaitable[_R]]]:
+    """Decorate a coroutine function so its requests run at ``priority``."""
+
+    def decorator(func: Callable[_P, Awaitable[_R]]) -> Callable[_P, Awaitable[_R]]:
+        @wraps(func)
+        async def wrapper(*args: _P.args, **kwargs: _P.kwargs) -> _R:
+            with requestPriority(priority):
+                return await func(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
+
+
+class RequestScheduler:
+    """Concurrency budgets per priority class for requests to one server.
+
+    Background requests only start while no interactive request is running
+    or waiting, and stay paused for a while after a slow interactive one, so
+    browsing stays responsive during a full library sync.
+    """
+
+    def __init__(self, budgets: dict[Priority, int] | None = None) -> None:
+        budgets = budgets or BUDGETS
+        self.__slots = {priority: asyncio.Semaphore(n) for priority, n in budgets.items()}
+        self.__interactive = 0
+        self.__holdUntil = 0.0
+        self.__calm = asyncio.Condition()
+
+    def __backgroundMayRun(self) -> bool:
+        return self.__interactive == 0 and time.monotonic() >= self.__holdUntil
+
+    async def __async_wait_for_calm(self) -> None:
+        async with self.__calm:
+            while not self.__backgroundMayRun():
+                hold = self.__holdUntil - time.monotonic()
+                try:
+                    async with asyncio.timeout(hold if hold > 0 else None):
+                        await self.__calm.wait()
+                except TimeoutError:
+                    pass
+
+    async def __async_notify(self) -> None:
+        async with self.__calm:
+            self.__calm.notify_all()
+
+    @asynccontextmanager
+    async def slot(self, priority: Priority | None = None) -> AsyncIterator[None]:
+        """Hold a request slot of ``priority`` (default: the current context's)."""
+        if priority is None:
+            priority = _priority.get()
+
+        if priority == Priority.INTERACTIVE:
+            self.__interactive += 1
+            started = time.monotonic()
+
+            try:
+                async with self.__slots[priority]:
+                    yield
+            finally:
+                self.__interactive -= 1
+                elapsed = time.monotonic() - started
+
+                if elapsed > SLOW_INTERACTIVE:
+                    LOGGER.debug("Slow interactive request (%.2fs), holding background work", elapsed)
+                    self.__holdUntil = max(self.__holdUntil, time.monotonic() + min(elapsed, MAX_HOLD))
+
+                await self.__async_notify()
+            return
+
+        async with self.__slots[priority]:
+            # เช็คหลังได้ slot แล้ว เผื่อมี interactive เข้ามาระหว่างรอ slot
+            if priority == Priority.BACKGROUND:
+                await self.__async_wait_for_calm()
+
+            yield
@@ -0,0 +1,241 @@
+from __future__ import annotations
+
+import asyncio
+import time
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Callable, Iterable
+from urllib.parse import parse_qs, urlparse
+
+from homeassistant.components.media_player import (
+    ATTR_MEDIA_CONTENT_ID,
+    ATTR_MEDIA_DURATION,
+)
+from homeassistant.const import STATE_PAUSED, STATE_PLAYING
+from homeassistant.core import Event, HomeAssistant, callback
+from homeassistant.helpers import entity_registry as er
+from homeassistant.helpers.event import (
+    async_track_state_change_event,
+    async_track_time_interval,
+)
+from homeassistant.helpers.storage import Store
+
+from .const import DOMAIN, LOGGER, SCROBBLE_FLUSH_INTERVAL, STORAGE_VERSION
+from .requestScheduler import Priority, withPriority
+from .subsonicApi import SubsonicApi
+
+BATCH_SIZE = 50
+QUEUE_LIMIT = 2000
+SAVE_DELAY = 10
+# a play counts after half the song or four minutes, whichever comes first
+# (30 seconds when the duration is unknown)
+MIN_PLAYED = 30
+MAX_PLAYED = 240
+
+
+def getSongIdFromUrl(
+    url: str | None,
+    baseUrls: Iterable[str] | None = None,
+    entryId: str | None = None,
+) -> str | None:
+    """Return the song id of a stream URL handed out by this integration.
+
+    With ``baseUrls`` a server stream URL only counts when it points at one
+    of them, and with ``entryId`` a relay URL only when it is of that entry,
+    so songs of another Subsonic server are not taken for ours.
+    """
+    if not url:
+        return None
+
+    parsed = urlparse(url)
+
+    for suffix in ("/rest/stream.view", "/rest/hls.m3u8"):
+        if not parsed.path.endswith(suffix):
+            continue
+
+        if baseUrls is not None:
+            base = f"{parsed.scheme}://{parsed.netloc}{parsed.path[:-len(suffix)]}".lower()
+            if base not in {b.rstrip("/").lower() for b in baseUrls}:
+                return None
+
+        return (parse_qs(parsed.query).get("id") or [None])[0]
+
+    relayPrefix = f"/api/{DOMAIN}/stream/"
+    if parsed.path.startswith(relayPrefix):
+        parts = parsed.path[len(relayPrefix):].split("/")
+        if len(parts) >= 2 and (entryId is None or parts[0] == entryId):
+            return parts[1]
+
+    return None
+
+
+@dataclass
+class _NowPlaying:
+    songId: str
+    startedAt: int  # ms since epoch, as the scrobble call wants it
+    duration: float | None
+    played: float = 0.0
+    resumedAt: float | None = None
+
+    def pause(self) -> None:
+        if self.resumedAt is not None:
+            self.played += time.monotonic() - self.resumedAt
+            self.resumedAt = None
+
+    def resume(self) -> None:
+        if self.resumedAt is None:
+            self.resumedAt = time.monotonic()
+
+    def finish(self) -> bool:
+        """Stop the clock and tell whether the play counts."""
+        self.pause()
+        needed = min(self.duration / 2, MAX_PLAYED) if self.duration else MIN_PLAYED
+
+        return self.played >= needed
+
+
+class Scrobbler:
+    """Record plays of Subsonic streams on watched media players.
+
+    Plays are kept in a persisted queue and sent with one multi-id
+    ``scrobble`` call per batch, so an offline server only delays them.
+    """
+
+    def __init__(self, hass: HomeAssistant, api: SubsonicApi, entryId: str) -> None:
+        self.hass = hass
+        self.api = api
+        self.entryId = entryId
+        self.__store = Store(hass, STORAGE_VERSION, f"{DOMAIN}.{entryId}.scrobbles")
+        self.__queue: list[tuple[str, int]] = []
+        self.__watched: set[str] = set()
+        self.__playing: dict[str, _NowPlaying] = {}
+        self.__unsubState = None
+        self.__unsubFlush = None
+        self.__lock = asyncio.Lock()
+        # called when a watched player starts a Subsonic song
+        self.onPlay: Callable[[], None] | None = None
+
+    async def async_setup(self) -> None:
+        stored = await self.__store.async_load()
+
+        if stored:
+            self.__queue = [tuple(item) for item in stored.get("queue", [])]
+
+            # player ที่ถูกลบไปแล้วไม่ต้องติดตามต่อ
+            registry = er.async_get(self.hass)
+            watched = stored.get("watched", [])
+            existing = [
+                entityId
+                for entityId in watched
+                if registry.async_get(entityId) is not None
+                or self.hass.states.get(entityId) is not None
+            ]
+            self.watch(existing)
+
+            if len(existing) != len(watched):
+                LOGGER.debug(
+                    "Scrobbler: no longer watching removed %s",
+                    sorted(set(watched) - set(existing)),
+                )
+                self.__store.async_delay_save(self.__dataToSave, SAVE_DELAY)
+
+        self.__unsubFlush = async_track_time_interval(
+            self.hass, self.async_flush, SCROBBLE_FLUSH_INTERVAL
+        )
+
+    @callback
+    def async_stop(self) -> None:
+        for unsub in (self.__unsubState, self.__unsubFlush):
+            if unsub is not None:
+                unsub()
+
+        self.__unsubState = None
+        self.__unsubFlush = None
+
+    @callback
+    def watch(self, entityIds: Iterable[str]) -> None:
+        """Start watching media players we sent Subsonic streams to."""
+        newIds = set(entityIds) - self.__watched
+        if not newIds:
+            return
+
+        self.__watched |= newIds
+        self.__store.async_delay_save(self.__dataToSave, SAVE_DELAY)
+
+        if self.__unsubState is not None:
+            self.__unsubState()
+
+        self.__unsubState = async_track_state_change_event(
+            self.hass, list(self.__watched), self.__stateChanged
+        )
+
+    @callback
+    def __stateChanged(self, event: Event) -> None:
+        entityId = event.data["entity_id"]
+        newState = event.data.get("new_state")
+        current = self.__playing.get(entityId)
+
+        songId = None
+        if newState is not None and newState.state in (STATE_PLAYING, STATE_PAUSED):
+            songId = getSongIdFromUrl(
+                newState.attributes.get(ATTR_MEDIA_CONTENT_ID), self.api.baseUrls, self.entryId
+            )
+
+        if current is not None and current.songId != songId:
+            del self.__playing[entityId]
+            if current.finish():
+                self.__enqueue(current)
+
+        if songId is None:
+            return
+
+        if current is None or current.songId != songId:
+            song = self.api.getCachedSong(songId) or {}
+            duration = newState.attributes.get(ATTR_MEDIA_DURATION) or song.get("duration")
+
+            current = self.__playing[entityId] = _NowPlaying(
+                songId=songId,
+                startedAt=int(datetime.now().timestamp() * 1000),
+                duration=float(duration) if duration else None,
+            )
+
+            if self.onPlay is not None:
+                self.onPlay()
+
+        if newState.state == STATE_PLAYING:
+            current.resume()
+        else:
+            current.pause()
+
+    def __enqueue(self, playing: _NowPlaying) -> None:
+        self.__queue.append((playing.songId, playing.startedAt))
+        del self.__queue[:-QUEUE_LIMIT]
+        self.__store.async_delay_save(self.__dataToSave, SAVE_DELAY)
+
+        if len(self.__queue) >= BATCH_SIZE:
+            self.hass.async_create_task(self.async_flush())
+
+    def __dataToSave(self) -> dict:
+        return {"queue": self.__queue, "watched": sorted(self.__watched)}
+
+    @withPriority(Priority.BACKGROUND)
+    async def async_flush(self, _now=None) -> None:
+        """Send queued plays in batches, keeping them if the server is away."""
+        async with self.__lock:
+            while self.__queue:
+                batch = self.__queue[:BATCH_SIZE]
+
+                try:
+                    ok = await self.api.scrobble(
+                        [songId for songId, _ in batch],
+                        [startedAt for _, startedAt in batch],
+                    )
+                except Exception as err:
+                    LOGGER.debug("Scrobble deferred, server unreachable: %s", err)
+                    return
+
+                if not ok:
+                    LOGGER.warning("Server refused %d scrobble(s), dropping them", len(batch))
+
+                del self.__queue[:len(batch)]
+                self.__store.async_delay_save(self.__dataToSave, SAVE_DELAY)
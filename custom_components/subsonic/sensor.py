@@ -0,0 +1,93 @@
+from __future__ import annotations
+
+from typing import Any
+
+from homeassistant.components.sensor import SensorEntity
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.core import HomeAssistant
+from homeassistant.helpers.entity_platform import AddEntitiesCallback
+from homeassistant.helpers.update_coordinator import CoordinatorEntity
+
+from .const import DOMAIN
+from .models import SubsonicData
+from .nowPlaying import NowPlayingCoordinator
+from .recentAlbums import RecentAlbumsCoordinator
+
+RECENT_ATTRIBUTES = ("id", "name", "artist", "artistId", "year", "genre", "coverArt", "created")
+NOW_PLAYING_ATTRIBUTES = ("id", "title", "artist", "album", "coverArt", "username", "playerName", "minutesAgo")
+
+
+async def async_setup_entry(
+    hass: HomeAssistant,
+    entry: ConfigEntry,
+    async_add_entities: AddEntitiesCallback,
+) -> None:
+    """Set up Subsonic sensors from a config entry."""
+    data: SubsonicData = hass.data[DOMAIN][entry.entry_id]
+
+    async_add_entities(
+        [
+            SubsonicRecentAlbumsSensor(data.recent, entry),
+            SubsonicNowPlayingSensor(data.nowPlaying, entry),
+        ]
+    )
+
+
+class SubsonicRecentAlbumsSensor(CoordinatorEntity[RecentAlbumsCoordinator], SensorEntity):
+    """Newest album added to the library, with the recent ones as attributes."""
+
+    _attr_icon = "mdi:album"
+
+    def __init__(self, coordinator: RecentAlbumsCoordinator, entry: ConfigEntry) -> None:
+        super().__init__(coordinator)
+        self._attr_name = f"{entry.title} recent albums"
+        self._attr_unique_id = f"{entry.entry_id}_recent_albums"
+
+    @property
+    def native_value(self) -> str | None:
+        albums = self.coordinator.data or []
+
+        if not albums:
+            return None
+
+        return albums[0].get("name")
+
+    @property
+    def extra_state_attributes(self) -> dict[str, Any]:
+        albums = self.coordinator.data or []
+
+        return {
+            "albums": [
+                {k: album[k] for k in RECENT_ATTRIBUTES if album.get(k) is not None}
+                for album in albums
+            ]
+        }
+
+
+class SubsonicNowPlayingSensor(CoordinatorEntity[NowPlayingCoordinator], SensorEntity):
+    """Number of streams the server is playing, with the songs as attributes."""
+
+    _attr_icon = "mdi:play-network"
+
+    def __init__(self, coordinator: NowPlayingCoordinator, entry: ConfigEntry) -> None:
+        super().__init__(coordinator)
+        self._attr_name = f"{entry.title} now playing"
+        self._attr_unique_id = f"{entry.entry_id}_now_playing"
+
+    @property
+    def native_value(self) -> int | None:
+        if self.coordinator.data is None:
+            return None
+
+        return len(self.coordinator.data)
+
+    @property
+    def extra_state_attributes(self) -> dict[str, Any]:
+        entries = self.coordinator.data or []
+
+        return {
+            "entries": [
+                {k: entry[k] for k in NOW_PLAYING_ATTRIBUTES if entry.get(k) is not None}
+                for entry in entries
+            ]
+        }
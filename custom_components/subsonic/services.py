@@ -1,26 +1,291 @@
 from __future__ import annotations
 
+import asyncio
+import itertools
 import logging
+import random
+from typing import Awaitable, Callable
 
 from homeassistant.core import HomeAssistant, ServiceCall
+from homeassistant.exceptions import HomeAssistantError
 from homeassistant.helpers.service import async_extract_entity_ids
 from homeassistant.const import ATTR_ENTITY_ID
 from homeassistant.components.media_player import DOMAIN as MP_DOMAIN
 
-from .const import DOMAIN
+from .const import DOMAIN, GENRE_PAGE_SIZE
+from .models import SubsonicData
+from .playRequests import PlayRequests
+from .profiler import async_profile
+from .radio import BatchSource, chainSources, listSource, pagedSource
+from .requestScheduler import Priority, withPriority
+from .streamProfiles import resolvePlayerProfile
 from .subsonicApi import SubsonicApi
 
 _LOGGER = logging.getLogger(__name__)
 
+SERVICES = (
+    "play_media",
+    "play_album",
+    "play_playlist",
+    "play_track",
+    "play_artist",
+    "play_radio",
+    "play_random_album",
+    "sync_library",
+    "refresh_recent",
+    "refresh_playlists",
+    "refresh_random_cache",
+    "profile",
+    "star",
+    "unstar",
+    "set_rating",
+)
+
+# media_player.play_media per target: first try + retries
+DISPATCH_ATTEMPTS = 3
+DISPATCH_RETRY_DELAY = 0.5
+
+
+def _parse_play_items(value) -> list[tuple[str, str]]:
+    """Normalise play_media ``items`` into (type, id) pairs.
+
+    Items are mappings with ``type``/``id`` (or ``media_content_type``/
+    ``media_content_id``), or ``"type:id"`` strings.
+    """
+    items: list[tuple[str, str]] = []
+
+    for item in value or []:
+        if isinstance(item, str):
+            media_type, _, media_id = item.partition(":")
+        elif isinstance(item, dict):
+            media_type = item.get("type") or item.get("media_content_type") or ""
+            media_id = item.get("id") or item.get("media_content_id") or ""
+        else:
+            media_type = media_id = ""
 
-async def async_register_services(hass: HomeAssistant, api: SubsonicApi) -> None:
+        if not media_type or not media_id:
+            _LOGGER.warning("subsonic.play_media: ignoring invalid item %s", item)
+            continue
+
+        items.append((str(media_type).strip().lower(), str(media_id).strip()))
+
+    return items
+
+
+def _artist_radio_source(api: SubsonicApi, artist_id: str) -> BatchSource:
+    """Songs similar to an artist, falling back when the server has none.
+
+    Servers without similar-artist data (e.g. Navidrome without Last.fm)
+    answer getSimilarSongs2 with nothing; the radio then plays the artist's
+    own songs shuffled, or random songs if even those are missing.
+    """
+    fallback: BatchSource | None = None
+
+    async def async_artist_pages():
+        yield await api.async_fetch_tracks("artist", artist_id)
+
+    async def async_random_batch(size: int) -> list[dict]:
+        return await api.getRandomSongs(size=size)
+
+    async def async_next_batch(size: int) -> list[dict]:
+        nonlocal fallback
+
+        if fallback is None:
+            songs = await api.getSimilarSongs2(artist_id, count=size)
+            if songs:
+                return songs
+
+            _LOGGER.debug("No similar songs for artist %s, playing their own songs", artist_id)
+            fallback = pagedSource(async_artist_pages(), shuffle=True)
+            songs = await fallback(size)
+
+            if not songs:
+                _LOGGER.debug("Artist %s has no songs, playing random songs", artist_id)
+                fallback = async_random_batch
+                songs = await fallback(size)
+
+            return songs
+
+        return await fallback(size)
+
+    return async_next_batch
+
+
+def _merge_tracks(track_lists: list[list[dict]], interleave: bool = False) -> list[dict]:
+    """Join the tracks of several items, in item order or round-robin."""
+    if not interleave:
+        return [track for tracks in track_lists for track in tracks]
+
+    merged = itertools.chain.from_iterable(itertools.zip_longest(*track_lists))
+    return [track for track in merged if track is not None]
+
+
+async def _async_fan_out_play_media(
+    hass: HomeAssistant, service_datas: dict[str, dict]
+) -> list[str]:
+    """Call media_player.play_media on every target at the same time.
+
+    The service data of every player is prepared by the caller, so all
+    calls are issued together; a failing entity is retried on its own
+    without holding up the rest. The spread between the first and last
+    call issued is logged, with retried players reported apart. Returns the
+    entities that started playing.
+    """
+    # entity → (เวลาที่ส่ง call ที่สำเร็จ, attempt ที่สำเร็จ)
+    started: dict[str, tuple[float, int]] = {}
+    loop = asyncio.get_running_loop()
+
+    async def async_play_one(entity_id: str, service_data: dict) -> None:
+        for attempt in range(1, DISPATCH_ATTEMPTS + 1):
+            issued = loop.time()
+            try:
+                await hass.services.async_call(
+                    MP_DOMAIN, "play_media", service_data, blocking=True
+                )
+            except Exception as err:
+                if attempt == DISPATCH_ATTEMPTS:
+                    _LOGGER.error(
+                        "media_player.play_media on %s failed after %d attempts: %s",
+                        entity_id,
+                        attempt,
+                        err,
+                    )
+                    return
+
+                _LOGGER.debug(
+                    "media_player.play_media on %s failed (attempt %d), retrying: %s",
+                    entity_id,
+                    attempt,
+                    err,
+                )
+                await asyncio.sleep(DISPATCH_RETRY_DELAY * attempt)
+                continue
+
+            started[entity_id] = (issued, attempt)
+            return
+
+    released = loop.time()
+    await asyncio.gather(
+        *(
+            async_play_one(entity_id, service_data)
+            for entity_id, service_data in service_datas.items()
+        )
+    )
+
+    on_time = [issued for issued, attempt in started.values() if attempt == 1]
+    if len(on_time) > 1:
+        _LOGGER.debug(
+            "play_media issued on %d/%d players, first after %.0f ms, spread %.0f ms",
+            len(on_time),
+            len(service_datas),
+            (min(on_time) - released) * 1000,
+            (max(on_time) - min(on_time)) * 1000,
+        )
+
+    for entity_id, (issued, attempt) in started.items():
+        if attempt > 1:
+            _LOGGER.debug(
+                "play_media on %s started on attempt %d, %.0f ms after dispatch",
+                entity_id,
+                attempt,
+                (issued - released) * 1000,
+            )
+
+    return list(started)
+
+
+def _get_entry_data(hass: HomeAssistant, entry_id: str) -> SubsonicData:
+    """Return the runtime data of the entry as it is loaded right now.
+
+    Saving options reloads the entry, so the data is looked up on every
+    call instead of being kept from the first registration.
+    """
+    domain_data = hass.data.get(DOMAIN) or {}
+    entry_data = domain_data.get(entry_id) or next(iter(domain_data.values()), None)
+
+    if entry_data is None:
+        raise HomeAssistantError("Subsonic is not loaded")
+
+    return entry_data
+
+
+async def async_register_services(hass: HomeAssistant, entry_id: str) -> None:
     """Register Subsonic/Navidrome services."""
 
+    # play ใหม่บน player เดิม → ยกเลิกงานเก่าที่ยัง resolve อยู่
+    play_requests = PlayRequests()
+
+    async def _async_resolve_tracks(media_type: str, media_id: str) -> list[dict]:
+        """Resolve one (type, id) into its songs, from the local caches when possible."""
+        entry_data = _get_entry_data(hass, entry_id)
+        api = entry_data.api
+
+        if media_type.lower() == "playlist":
+            # playlist มี cache อยู่แล้ว ไม่ต้องดึงทั้ง playlist ใหม่ทุกครั้ง
+            playlist = await entry_data.playlists.async_get_playlist(media_id)
+            return playlist.get("songs", []) or []
+
+        if media_type.lower() in ("starred", "favorites"):
+            # เพลงที่ติดดาว มาจาก star cache ไม่ต้องดึงจาก server
+            return await entry_data.starred.async_get("songs")
+
+        return await api.async_fetch_tracks(media_type, media_id)
+
+    async def _async_resolve_items(items: list[tuple[str, str]]) -> list[list[dict]]:
+        """Resolve many items at once; an item listed twice is resolved once."""
+        unique = list(dict.fromkeys(items))
+
+        async def async_resolve_one(media_type: str, media_id: str) -> list[dict]:
+            try:
+                return await _async_resolve_tracks(media_type, media_id)
+            except Exception as err:
+                # item เดียวพังไม่ควรทำให้ทั้งคิวล้ม
+                _LOGGER.error(
+                    "Error resolving %s %s from Subsonic: %s", media_type, media_id, err
+                )
+                return []
+
+        resolved = await asyncio.gather(*(async_resolve_one(*item) for item in unique))
+        by_item = dict(zip(unique, resolved))
+
+        return [by_item[item] for item in items]
+
+    async def _async_dispatch_radio(
+        sequence: int,
+        entity_ids: list[str],
+        start: Callable[[list[str]], Awaitable[None]],
+    ) -> None:
+        """Start radios for a play request while it is still the latest one.
+
+        The start runs in a task that a newer request on the same players
+        cancels, and under their dispatch locks like any other playback.
+        """
+
+        async def async_start() -> None:
+            async with play_requests.dispatching(entity_ids):
+                targets = play_requests.current(sequence, entity_ids)
+                if targets:
+                    await start(targets)
+
+        task = hass.async_create_task(async_start())
+        play_requests.track(sequence, entity_ids, task)
+
+        try:
+            await task
+        except asyncio.CancelledError:
+            if asyncio.current_task().cancelling():
+                raise
+            _LOGGER.debug("Radio on %s superseded by a newer request", entity_ids)
+
     # ------------------------------------------------------------------
     # CORE: subsonic.play_media
     # ------------------------------------------------------------------
+    @withPriority(Priority.PLAYBACK)
     async def async_handle_play_media(call: ServiceCall) -> None:
         """Handle subsonic.play_media service."""
+        entry_data = _get_entry_data(hass, entry_id)
+
+        api = entry_data.api
 
         entity_ids = async_extract_entity_ids(hass, call)
         if not entity_ids:
@@ -29,83 +294,238 @@ async def async_register_services(hass: HomeAssistant, api: SubsonicApi) -> None
 
         media_type: str = call.data.get("media_content_type")
         media_id: str = call.data.get("media_content_id")
+        items = _parse_play_items(call.data.get("items"))
         shuffle: bool = call.data.get("shuffle", False)
         enqueue: bool = call.data.get("enqueue", False)
+        interleave: bool = call.data.get("interleave", False)
 
-        if not media_type or not media_id:
+        if media_type and media_id:
+            items.insert(0, (media_type.lower(), media_id))
+
+        if not items:
             _LOGGER.warning(
-                "subsonic.play_media missing media_content_type or media_content_id"
+                "subsonic.play_media missing media_content_type/media_content_id or items"
             )
             return
 
         _LOGGER.debug(
-            "subsonic.play_media: type=%s id=%s shuffle=%s enqueue=%s targets=%s",
-            media_type,
-            media_id,
+            "subsonic.play_media: items=%s shuffle=%s interleave=%s enqueue=%s targets=%s",
+            items,
             shuffle,
+            interleave,
             enqueue,
             entity_ids,
         )
 
-        # resolve track list ผ่าน SubsonicApi
+        # enqueue แค่ต่อท้ายคิว จึงไม่แทนที่ play ที่ยังค้างอยู่
+        sequence = None if enqueue else play_requests.begin(entity_ids)
+
+        def current_targets() -> list[str]:
+            if sequence is None:
+                return list(entity_ids)
+            return play_requests.current(sequence, entity_ids)
+
+        if len(items) == 1 and items[0][0] in ("genre", "songs_by_genre"):
+            media_id = items[0][1]
+
+            async def async_queue_genre_on_jukebox(jukebox) -> None:
+                # jukebox ได้ id ทีละหน้า: หน้าแรกแทนคิว (หรือต่อท้ายถ้า enqueue) ที่เหลือต่อท้าย
+                replace = not enqueue
+                async for page in api.iterSongsByGenre(media_id):
+                    ids = [song["id"] for song in page if song.get("id")]
+                    if shuffle:
+                        random.shuffle(ids)
+
+                    if replace:
+                        await jukebox.async_set(ids)
+                        replace = False
+                    else:
+                        await jukebox.async_add(ids)
+
+            async def async_start_genre(targets: list[str]) -> None:
+                starts = []
+
+                jukebox = entry_data.jukebox
+                if jukebox is not None and jukebox.entityId in targets:
+                    targets = [e for e in targets if e != jukebox.entityId]
+                    starts.append(async_queue_genre_on_jukebox(jukebox))
+
+                # genre อาจมีเป็นหมื่นเพลง → เล่นจากหน้าแรก แล้วโหลดหน้าถัดไปตอนคิวใกล้หมด
+                # (source แยกต่อ player เพราะแต่ละตัวเล่นไปคนละจังหวะ)
+                starts.append(
+                    entry_data.radio.async_start(
+                        targets,
+                        lambda: pagedSource(api.iterSongsByGenre(media_id), shuffle),
+                        enqueue=enqueue,
+                    )
+                )
+                await asyncio.gather(*starts)
+
+            if sequence is None:
+                async with play_requests.dispatching(entity_ids):
+                    await async_start_genre(list(entity_ids))
+            else:
+                await _async_dispatch_radio(sequence, entity_ids, async_start_genre)
+            return
+
+        # resolve ทุก item พร้อมกัน → รอเท่ากับ item ที่ช้าที่สุด
+        # (แยกเป็น task เพื่อให้ request ที่ใหม่กว่ายกเลิกได้ รวมถึง HTTP request ที่ค้างอยู่)
+        started = asyncio.get_running_loop().time()
+        resolution = hass.async_create_task(_async_resolve_items(items))
+        if sequence is not None:
+            play_requests.track(sequence, entity_ids, resolution)
+
         try:
-            tracks = await api.async_resolve_tracks(
-                media_type=media_type,
-                media_id=media_id,
-                shuffle=shuffle,
-            )
-        except Exception as err:
-            _LOGGER.error("Error resolving tracks from Subsonic: %s", err)
+            tracks = _merge_tracks(await resolution, interleave)
+        except asyncio.CancelledError:
+            if asyncio.current_task().cancelling():
+                raise
+            _LOGGER.debug("subsonic.play_media: %s superseded by a newer request", items)
             return
 
+        _LOGGER.debug(
+            "subsonic.play_media: resolved %d item(s) into %d tracks in %.0f ms",
+            len(items),
+            len(tracks),
+            (asyncio.get_running_loop().time() - started) * 1000,
+        )
+
         if not tracks:
-            _LOGGER.warning(
-                "subsonic.play_media: no tracks resolved for type=%s id=%s",
-                media_type,
-                media_id,
-            )
+            _LOGGER.warning("subsonic.play_media: no tracks resolved for %s", items)
             return
 
-        # TODO: ถ้าคุณอยากทำ queue management ฝั่ง integration
-        # สามารถเก็บ tracks ลง hass.data[DOMAIN]["queue"] ที่นี่ได้
+        # shuffle ครั้งเดียว ทุก player จะได้ลำดับเดียวกัน
+        if shuffle:
+            tracks = list(tracks)
+            random.shuffle(tracks)
 
-        first_track = tracks[0]
-        stream_url = first_track.get("stream_url")
-        mime_type = first_track.get("mime_type", "music")
+        # genre ใน items ได้แค่หน้าแรกตอน resolve → หน้าที่เหลือต่อท้ายทีละหน้าตอนคิวใกล้หมด
+        genre_ids = [
+            item_id
+            for item_type, item_id in dict.fromkeys(items)
+            if item_type in ("genre", "songs_by_genre")
+        ]
 
-        if not stream_url:
-            _LOGGER.error(
-                "First track has no stream_url (media_type=%s id=%s)",
-                media_type,
-                media_id,
-            )
-            return
+        async def async_genre_tail_pages():
+            for genre_id in genre_ids:
+                async for page in api.iterSongsByGenre(genre_id, offset=GENRE_PAGE_SIZE):
+                    yield page
 
-        for entity_id in entity_ids:
-            service_data = {
-                ATTR_ENTITY_ID: entity_id,
-                "media_content_id": stream_url,
-                "media_content_type": mime_type,
-            }
+        def rest_source(rest: list[dict]) -> BatchSource:
+            if not genre_ids:
+                return listSource(rest)
+            return chainSources(listSource(rest), pagedSource(async_genre_tail_pages(), shuffle))
 
-            _LOGGER.debug(
-                "Calling media_player.play_media on %s with url=%s type=%s",
-                entity_id,
-                stream_url,
-                mime_type,
-            )
+        # TODO: ถ้าคุณอยากทำ queue management ฝั่ง integration
+        # สามารถเก็บ tracks ลง hass.data[DOMAIN]["queue"] ที่นี่ได้
 
-            await hass.services.async_call(
-                MP_DOMAIN,
-                "play_media",
-                service_data,
-                blocking=False,
-            )
+        # ส่งตามลำดับต่อ player และส่งเฉพาะ player ที่ยังไม่มี request ใหม่กว่า
+        # → request ล่าสุดชนะเสมอ
+        async with play_requests.dispatching(entity_ids):
+            entity_ids = current_targets()
+            if not entity_ids:
+                _LOGGER.debug("subsonic.play_media: %s superseded before dispatch", items)
+                return
+
+            # jukebox ได้ทั้งคิวใน request เดียว ไม่ต้องส่ง URL ทีละเพลง
+            # (หน้าที่เหลือของ genre ตามไปทีหลัง ไม่ต้องให้ player อื่นรอ)
+            followups = []
+            jukebox = entry_data.jukebox
+            if jukebox is not None and jukebox.entityId in entity_ids:
+                entity_ids = [e for e in entity_ids if e != jukebox.entityId]
+                ids = [track["id"] for track in tracks if track.get("id")]
+
+                if enqueue:
+                    await jukebox.async_add(ids)
+                else:
+                    await jukebox.async_set(ids)
+
+                async def async_add_genre_tail_on_jukebox() -> None:
+                    async for page in async_genre_tail_pages():
+                        page = list(page)
+                        if shuffle:
+                            random.shuffle(page)
+                        await jukebox.async_add([song["id"] for song in page if song.get("id")])
+
+                if genre_ids:
+                    followups.append(async_add_genre_tail_on_jukebox())
+
+            if not entity_ids:
+                await asyncio.gather(*followups)
+                return
+
+            if enqueue:
+                # ต่อท้ายสิ่งที่เล่นอยู่ (list แยกต่อ player เพราะแต่ละตัวเล่นไปคนละจังหวะ)
+                await asyncio.gather(
+                    entry_data.radio.async_start(
+                        entity_ids, lambda: rest_source(tracks), enqueue=True
+                    ),
+                    *followups,
+                )
+                return
+
+            entry_data.scrobbler.watch(entity_ids)
+
+            # เตรียม URL ของทุก player ให้เสร็จก่อน แล้วค่อยส่งพร้อมกัน
+            service_datas: dict[str, dict] = {}
+
+            for entity_id in entity_ids:
+                # format / bitrate เลือกตาม player แต่ละตัว
+                profile = resolvePlayerProfile(
+                    hass, entity_id, entry_data.entry.options, api.capabilities
+                )
+                first_track = api.prepareTracks(
+                    tracks[:1], profile=profile, streamUrl=entry_data.getSongStreamUrl
+                )[0]
+                stream_url = first_track.get("stream_url")
+                mime_type = first_track.get("mime_type", "music")
+
+                if not stream_url:
+                    _LOGGER.error(
+                        "First track has no stream_url (items=%s)",
+                        items,
+                    )
+                    await asyncio.gather(*followups)
+                    return
+
+                _LOGGER.debug(
+                    "Prepared media_player.play_media on %s with url=%s type=%s profile=%s",
+                    entity_id,
+                    stream_url,
+                    mime_type,
+                    profile.name,
+                )
+
+                service_datas[entity_id] = {
+                    ATTR_ENTITY_ID: entity_id,
+                    "media_content_id": stream_url,
+                    "media_content_type": mime_type,
+                }
+
+                # player นี้ถูกสั่งเล่นอย่างอื่นแล้ว → radio เดิมต้องหยุด
+                entry_data.radio.stop(entity_id)
+
+            started = await _async_fan_out_play_media(hass, service_datas)
+
+            # เพลงที่เหลือ: player ที่ enqueue ได้จะได้ต่อท้ายคิวทีละ batch
+            # ที่เหลือจะได้เพลงถัดไปตอน player ว่าง
+            if len(tracks) > 1 or genre_ids:
+                followups.extend(
+                    entry_data.radio.async_continue(
+                        entity_id,
+                        service_datas[entity_id]["media_content_id"],
+                        rest_source(tracks[1:]),
+                    )
+                    for entity_id in started
+                )
+
+            await asyncio.gather(*followups)
 
     # ------------------------------------------------------------------
     # WRAPPERS: play_album / play_playlist / play_track / play_artist
     # ------------------------------------------------------------------
 
+    @withPriority(Priority.PLAYBACK)
     async def async_handle_play_album(call: ServiceCall) -> None:
         """Handle subsonic.play_album – wrapper around play_media."""
         entity_ids = async_extract_entity_ids(hass, call)
@@ -136,6 +556,7 @@ async def async_register_services(hass: HomeAssistant, api: SubsonicApi) -> None
             blocking=False,
         )
 
+    @withPriority(Priority.PLAYBACK)
     async def async_handle_play_playlist(call: ServiceCall) -> None:
         """Handle subsonic.play_playlist – wrapper around play_media."""
         entity_ids = async_extract_entity_ids(hass, call)
@@ -166,6 +587,7 @@ async def async_register_services(hass: HomeAssistant, api: SubsonicApi) -> None
             blocking=False,
         )
 
+    @withPriority(Priority.PLAYBACK)
     async def async_handle_play_track(call: ServiceCall) -> None:
         """Handle subsonic.play_track – wrapper around play_media."""
         entity_ids = async_extract_entity_ids(hass, call)
@@ -194,8 +616,9 @@ async def async_register_services(hass: HomeAssistant, api: SubsonicApi) -> None
             blocking=False,
         )
 
+    @withPriority(Priority.PLAYBACK)
     async def async_handle_play_artist(call: ServiceCall) -> None:
-        """Handle subsonic.play_artist – wrapper around play_media."""
+        """Handle subsonic.play_artist – wrapper around play_media / play_radio."""
         entity_ids = async_extract_entity_ids(hass, call)
         if not entity_ids:
             _LOGGER.warning("subsonic.play_artist called without target media_player")
@@ -209,6 +632,21 @@ async def async_register_services(hass: HomeAssistant, api: SubsonicApi) -> None
             _LOGGER.warning("subsonic.play_artist missing artist_id")
             return
 
+        if shuffle and not enqueue:
+            # shuffle = radio ของ artist นี้ (getSimilarSongs2) ไม่ต้องโหลดทุก album
+            data = {
+                ATTR_ENTITY_ID: entity_ids,
+                "artist_id": artist_id,
+            }
+
+            await hass.services.async_call(
+                DOMAIN,
+                "play_radio",
+                data,
+                blocking=False,
+            )
+            return
+
         data = {
             ATTR_ENTITY_ID: entity_ids,
             "media_content_type": "artist",
@@ -224,12 +662,67 @@ async def async_register_services(hass: HomeAssistant, api: SubsonicApi) -> None
             blocking=False,
         )
 
+    # ------------------------------------------------------------------
+    # RADIO (endless, server-side random / similar songs)
+    # ------------------------------------------------------------------
+
+    @withPriority(Priority.PLAYBACK)
+    async def async_handle_play_radio(call: ServiceCall) -> None:
+        """Handle subsonic.play_radio – endless playback topped up in small batches."""
+        entry_data = _get_entry_data(hass, entry_id)
+        api = entry_data.api
+
+        entity_ids = async_extract_entity_ids(hass, call)
+        if not entity_ids:
+            _LOGGER.warning("subsonic.play_radio called without target media_player")
+            return
+
+        artist_id: str | None = call.data.get("artist_id")
+        genre: str | None = call.data.get("genre")
+        year_from = call.data.get("year_from")
+        year_to = call.data.get("year_to")
+
+        async def async_random_batch(size: int) -> list[dict]:
+            return await api.getRandomSongs(
+                size=size,
+                genre=genre,
+                fromYear=int(year_from) if year_from else None,
+                toYear=int(year_to) if year_to else None,
+            )
+
+        # source แยกต่อ player: fallback ของ artist จำสถานะไว้ ใช้ร่วมกันไม่ได้
+        def source_factory() -> BatchSource:
+            if artist_id:
+                return _artist_radio_source(api, artist_id)
+            return async_random_batch
+
+        _LOGGER.debug(
+            "subsonic.play_radio: artist=%s genre=%s years=%s-%s targets=%s",
+            artist_id,
+            genre,
+            year_from,
+            year_to,
+            entity_ids,
+        )
+
+        # radio ก็เป็น play request เหมือนกัน → request ที่ใหม่กว่าชนะ
+        sequence = play_requests.begin(entity_ids)
+
+        async def async_start_radio(targets: list[str]) -> None:
+            await entry_data.radio.async_start(targets, source_factory)
+
+        await _async_dispatch_radio(sequence, entity_ids, async_start_radio)
+
     # ------------------------------------------------------------------
     # RANDOM ALBUM
     # ------------------------------------------------------------------
 
+    @withPriority(Priority.PLAYBACK)
     async def async_handle_play_random_album(call: ServiceCall) -> None:
         """Handle subsonic.play_random_album – pick album then call play_media."""
+        entry_data = _get_entry_data(hass, entry_id)
+
+        api = entry_data.api
 
         entity_ids = async_extract_entity_ids(hass, call)
         if not entity_ids:
@@ -285,8 +778,6 @@ async def async_register_services(hass: HomeAssistant, api: SubsonicApi) -> None
             _LOGGER.warning("subsonic.play_random_album: no matching albums after filter")
             return
 
-        import random
-
         album = random.choice(candidates)
         album_id = album.get("id")
         if not album_id:
@@ -314,22 +805,53 @@ async def async_register_services(hass: HomeAssistant, api: SubsonicApi) -> None
     # LIBRARY / MAINTENANCE (stubs – log only for now)
     # ------------------------------------------------------------------
 
+    @withPriority(Priority.BACKGROUND)
     async def async_handle_sync_library(call: ServiceCall) -> None:
         """Handle subsonic.sync_library."""
+        entry_data = _get_entry_data(hass, entry_id)
+
         full = call.data.get("full", False)
         _LOGGER.info("subsonic.sync_library called (full=%s)", full)
-        # TODO: implement sync logic (pull all albums/tracks/playlists, update sensors etc.)
 
+        # full → โหลด track ทั้งหมดด้วย (ช้ากว่ามากใน library ใหญ่)
+        kinds = ("artists", "albums", "tracks") if full else ("artists", "albums")
+
+        try:
+            await entry_data.library.async_refresh(kinds)
+            await entry_data.playlists.async_refresh()
+            await entry_data.starred.async_refresh()
+        except Exception as err:
+            _LOGGER.error("subsonic.sync_library failed: %s", err)
+            return
+
+        entry_data.browse.clear()
+
+        await entry_data.recent.async_refresh()
+
+    @withPriority(Priority.BACKGROUND)
     async def async_handle_refresh_recent(call: ServiceCall) -> None:
         """Handle subsonic.refresh_recent."""
+        entry_data = _get_entry_data(hass, entry_id)
+
         _LOGGER.info("subsonic.refresh_recent called")
-        # TODO: implement refreshing recently added sensor(s)
+        await entry_data.recent.async_refresh()
 
+    @withPriority(Priority.BACKGROUND)
     async def async_handle_refresh_playlists(call: ServiceCall) -> None:
         """Handle subsonic.refresh_playlists."""
+        entry_data = _get_entry_data(hass, entry_id)
+
         _LOGGER.info("subsonic.refresh_playlists called")
-        # TODO: implement refreshing playlists cache / entities
 
+        try:
+            changed = await entry_data.playlists.async_refresh()
+        except Exception as err:
+            _LOGGER.error("Error refreshing playlists from Subsonic: %s", err)
+            return
+
+        _LOGGER.info("subsonic.refresh_playlists: %d playlist(s) updated", len(changed))
+
+    @withPriority(Priority.BACKGROUND)
     async def async_handle_refresh_random_cache(call: ServiceCall) -> None:
         """Handle subsonic.refresh_random_cache."""
         _LOGGER.info("subsonic.refresh_random_cache called")
@@ -354,11 +876,71 @@ async def async_register_services(hass: HomeAssistant, api: SubsonicApi) -> None
     if not hass.services.has_service(DOMAIN, "play_artist"):
         hass.services.async_register(DOMAIN, "play_artist", async_handle_play_artist)
 
+    if not hass.services.has_service(DOMAIN, "play_radio"):
+        hass.services.async_register(DOMAIN, "play_radio", async_handle_play_radio)
+
     if not hass.services.has_service(DOMAIN, "play_random_album"):
         hass.services.async_register(
             DOMAIN, "play_random_album", async_handle_play_random_album
         )
 
+    # ------------------------------------------------------------------
+    # FAVORITES: star / unstar / set_rating (local first, written back in batches)
+    # ------------------------------------------------------------------
+
+    def _as_list(value) -> list[str]:
+        if not value:
+            return []
+        if isinstance(value, (list, tuple)):
+            return [str(v) for v in value]
+        return [str(value)]
+
+    async def _async_set_starred(call: ServiceCall, starred: bool) -> None:
+        entry_data = _get_entry_data(hass, entry_id)
+
+        for kind, key in (("songs", "song_id"), ("albums", "album_id"), ("artists", "artist_id")):
+            ids = _as_list(call.data.get(key))
+            if ids:
+                await entry_data.starred.async_set_starred(kind, ids, starred)
+
+    async def async_handle_star(call: ServiceCall) -> None:
+        """Handle subsonic.star."""
+        try:
+            await _async_set_starred(call, True)
+        except Exception as err:
+            _LOGGER.error("subsonic.star failed: %s", err)
+
+    async def async_handle_unstar(call: ServiceCall) -> None:
+        """Handle subsonic.unstar."""
+        try:
+            await _async_set_starred(call, False)
+        except Exception as err:
+            _LOGGER.error("subsonic.unstar failed: %s", err)
+
+    async def async_handle_set_rating(call: ServiceCall) -> None:
+        """Handle subsonic.set_rating."""
+        entry_data = _get_entry_data(hass, entry_id)
+
+        item_id = call.data.get("id")
+        rating = call.data.get("rating")
+
+        if not item_id or rating is None:
+            _LOGGER.warning("subsonic.set_rating missing id or rating")
+            return
+
+        entry_data.starred.setRating(str(item_id), max(0, min(5, int(rating))))
+
+    async def async_handle_profile(call: ServiceCall) -> None:
+        """Handle subsonic.profile – record a cProfile of the event loop."""
+        duration = float(call.data.get("duration", 30))
+        top = int(call.data.get("top", 20))
+
+        try:
+            await async_profile(hass, duration, top)
+        except (RuntimeError, ValueError) as err:
+            # ValueError: มี profiler ตัวอื่น (เช่น integration profiler ของ HA) ทำงานอยู่
+            _LOGGER.warning("subsonic.profile could not start: %s", err)
+
     if not hass.services.has_service(DOMAIN, "sync_library"):
         hass.services.async_register(DOMAIN, "sync_library", async_handle_sync_library)
 
@@ -376,3 +958,21 @@ async def async_register_services(hass: HomeAssistant, api: SubsonicApi) -> None
         hass.services.async_register(
             DOMAIN, "refresh_random_cache", async_handle_refresh_random_cache
         )
+
+    if not hass.services.has_service(DOMAIN, "profile"):
+        hass.services.async_register(DOMAIN, "profile", async_handle_profile)
+
+    if not hass.services.has_service(DOMAIN, "star"):
+        hass.services.async_register(DOMAIN, "star", async_handle_star)
+
+    if not hass.services.has_service(DOMAIN, "unstar"):
+        hass.services.async_register(DOMAIN, "unstar", async_handle_unstar)
+
+    if not hass.services.has_service(DOMAIN, "set_rating"):
+        hass.services.async_register(DOMAIN, "set_rating", async_handle_set_rating)
+
+
+def async_unload_services(hass: HomeAssistant) -> None:
+    """Remove the Subsonic services (after the last entry was unloaded)."""
+    for service in SERVICES:
+        hass.services.async_remove(DOMAIN, service)
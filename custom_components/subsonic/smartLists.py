@@ -0,0 +1,81 @@
+from __future__ import annotations
+
+import asyncio
+from functools import partial
+
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers.event import async_track_time_interval
+
+from .const import LOGGER, SMART_LIST_SIZE, SMART_LISTS
+from .requestScheduler import Priority, withPriority
+from .starredCache import StarredCache
+from .subsonicApi import SubsonicApi
+
+
+class SmartLists:
+    """Small windows of the album rankings the server already computes.
+
+    Each ``getAlbumList2`` ranking (newest, recent, frequent, highest) keeps
+    its first ``SMART_LIST_SIZE`` albums and is refreshed on its own
+    interval from ``SMART_LISTS``, so opening one never waits for the
+    server. Starred albums come from the star cache, which already follows
+    local star changes.
+    """
+
+    def __init__(self, hass: HomeAssistant, api: SubsonicApi, starred: StarredCache) -> None:
+        self.hass = hass
+        self.api = api
+        self.starred = starred
+        self.__albums: dict[str, list[dict]] = {}
+        self.__locks = {kind: asyncio.Lock() for kind in SMART_LISTS}
+        self.__unsubs: list = []
+
+    @callback
+    def async_start(self) -> None:
+        """Refresh every list now and then on its own interval."""
+        for kind, interval in SMART_LISTS.items():
+            if interval is None:
+                continue
+
+            self.__unsubs.append(
+                async_track_time_interval(self.hass, partial(self.__async_scheduled, kind), interval)
+            )
+            self.hass.async_create_background_task(
+                self.__async_scheduled(kind), f"subsonic_smart_list_{kind}"
+            )
+
+    @callback
+    def async_stop(self) -> None:
+        for unsub in self.__unsubs:
+            unsub()
+
+        self.__unsubs.clear()
+
+    @withPriority(Priority.BACKGROUND)
+    async def __async_scheduled(self, kind: str, _now=None) -> None:
+        try:
+            await self.async_refresh(kind)
+        except Exception as err:
+            LOGGER.debug("Smart list %s refresh failed: %s", kind, err)
+
+    async def async_refresh(self, kind: str) -> None:
+        """Fetch the window of ``kind`` again.
+
+        The listing goes through the conditional request cache, so an
+        unchanged ranking costs a 304 and browse nodes built from it stay.
+        """
+        async with self.__locks[kind]:
+            self.__albums[kind] = await self.api.getAlbumList(kind, size=SMART_LIST_SIZE)
+
+    async def async_get(self, kind: str) -> list[dict]:
+        """Return the albums of a smart list, fetching it only the first time."""
+        if kind not in SMART_LISTS:
+            raise ValueError(f"Unknown smart list {kind}")
+
+        if kind == "starred":
+            return await self.starred.async_get("albums")
+
+        if kind not in self.__albums:
+            await self.async_refresh(kind)
+
+        return list(self.__albums[kind])
@@ -0,0 +1,190 @@
+from __future__ import annotations
+
+import asyncio
+from typing import Callable, Iterable
+
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers.event import async_call_later
+from homeassistant.helpers.storage import Store
+
+from .const import DOMAIN, LOGGER, STORAGE_VERSION
+from .requestScheduler import Priority, withPriority
+from .subsonicApi import SubsonicApi
+
+KINDS = ("artists", "albums", "songs")
+SAVE_DELAY = 10
+# star/unstar/rating changes made within this window go out together
+WRITE_BACK_DELAY = 5
+RETRY_DELAY = 60
+
+
+class StarredCache:
+    """Starred artists, albums and songs kept locally.
+
+    ``star``/``unstar``/``setRating`` change the cache right away and queue
+    the change; queued changes are written back together after a short
+    delay (one ``star`` and one ``unstar`` request for everything), and stay
+    queued across restarts until the server accepted them.
+    """
+
+    def __init__(self, hass: HomeAssistant, api: SubsonicApi, entryId: str) -> None:
+        self.hass = hass
+        self.api = api
+        self.__store = Store(hass, STORAGE_VERSION, f"{DOMAIN}.{entryId}.starred")
+        self.__starred: dict[str, dict[str, dict]] | None = None
+        # (kind, id) → True (star) / False (unstar); the last change wins
+        self.__pendingStars: dict[tuple[str, str], bool] = {}
+        self.__pendingRatings: dict[str, int] = {}
+        self.__unsubWriteBack = None
+        self.__lock = asyncio.Lock()
+        # called whenever the starred items changed
+        self.onChange: Callable[[], None] | None = None
+
+    async def async_load(self) -> None:
+        """Restore the cache and unsent changes saved by a previous run."""
+        stored = await self.__store.async_load()
+        if not stored:
+            return
+
+        self.__starred = stored.get("starred")
+        self.__pendingStars = {
+            (kind, id): starred for kind, id, starred in stored.get("pendingStars", [])
+        }
+        self.__pendingRatings = stored.get("pendingRatings", {})
+
+        if self.__starred:
+            self.api.rememberSongs(list(self.__starred["songs"].values()))
+
+        if self.__pendingStars or self.__pendingRatings:
+            self.__scheduleWriteBack(WRITE_BACK_DELAY)
+
+    @callback
+    def async_stop(self) -> None:
+        if self.__unsubWriteBack is not None:
+            self.__unsubWriteBack()
+            self.__unsubWriteBack = None
+
+    def __dataToSave(self) -> dict:
+        return {
+            "starred": self.__starred,
+            "pendingStars": [
+                [kind, id, starred] for (kind, id), starred in self.__pendingStars.items()
+            ],
+            "pendingRatings": self.__pendingRatings,
+        }
+
+    def __save(self) -> None:
+        self.__store.async_delay_save(self.__dataToSave, SAVE_DELAY)
+
+    async def async_refresh(self) -> None:
+        """Fetch the starred items again, keeping changes not yet written back."""
+        async with self.__lock:
+            starred = await self.api.getStarred2()
+
+            self.__starred = {
+                kind: {item["id"]: item for item in starred[kind] if item.get("id")}
+                for kind in KINDS
+            }
+
+            for (kind, id), isStarred in self.__pendingStars.items():
+                self.__apply(kind, id, isStarred)
+
+            self.__save()
+            self.__changed()
+
+    async def async_get(self, kind: str) -> list[dict]:
+        """Return the starred items of ``kind``, fetching them only once."""
+        if self.__starred is None:
+            await self.async_refresh()
+
+        return list(self.__starred[kind].values())
+
+    def __changed(self) -> None:
+        if self.onChange is not None:
+            self.onChange()
+
+    def __apply(self, kind: str, id: str, isStarred: bool) -> None:
+        items = self.__starred[kind]
+
+        if not isStarred:
+            items.pop(id, None)
+        elif id not in items:
+            # metadata เต็มจะมาตอน refresh ครั้งถัดไป
+            song = self.api.getCachedSong(id) if kind == "songs" else None
+            items[id] = dict(song) if song else {"id": id}
+
+    @callback
+    def __scheduleWriteBack(self, delay: float) -> None:
+        if self.__unsubWriteBack is not None:
+            return
+
+        self.__unsubWriteBack = async_call_later(self.hass, delay, self.__writeBackLater)
+
+    @callback
+    def __writeBackLater(self, _now) -> None:
+        self.__unsubWriteBack = None
+        self.hass.async_create_task(self.async_write_back())
+
+    async def async_set_starred(self, kind: str, ids: Iterable[str], isStarred: bool) -> None:
+        """Star or unstar items locally and queue the change for the server."""
+        if self.__starred is None:
+            await self.async_refresh()
+
+        for id in ids:
+            self.__apply(kind, id, isStarred)
+            self.__pendingStars[(kind, id)] = isStarred
+
+        self.__save()
+        self.__changed()
+        self.__scheduleWriteBack(WRITE_BACK_DELAY)
+
+    @callback
+    def setRating(self, id: str, rating: int) -> None:
+        """Queue a rating change, repeated changes of one item are sent once."""
+        for items in (self.__starred or {}).values():
+            if id in items:
+                items[id]["userRating"] = str(rating)
+
+        self.__pendingRatings[id] = rating
+        self.__save()
+        self.__changed()
+        self.__scheduleWriteBack(WRITE_BACK_DELAY)
+
+    @withPriority(Priority.BACKGROUND)
+    async def async_write_back(self) -> None:
+        """Send queued changes, keeping them queued if the server is away."""
+        async with self.__lock:
+            stars = dict(self.__pendingStars)
+            ratings = dict(self.__pendingRatings)
+
+            if not stars and not ratings:
+                return
+
+            def ids(kind: str, isStarred: bool) -> list[str]:
+                return [id for (k, id), s in stars.items() if k == kind and s == isStarred]
+
+            try:
+                for isStarred, send in ((True, self.api.star), (False, self.api.unstar)):
+                    if not await send(
+                        ids("songs", isStarred), ids("albums", isStarred), ids("artists", isStarred)
+                    ):
+                        LOGGER.warning("Server refused %s changes, dropping them",
+                                       "star" if isStarred else "unstar")
+
+                for id, rating in ratings.items():
+                    if not await self.api.setRating(id, rating):
+                        LOGGER.warning("Server refused rating %s for %s", rating, id)
+                    if self.__pendingRatings.get(id) == rating:
+                        del self.__pendingRatings[id]
+            except Exception as err:
+                LOGGER.debug("Star write-back deferred, server unreachable: %s", err)
+                self.__save()
+                self.__scheduleWriteBack(RETRY_DELAY)
+                return
+
+            # ลบเฉพาะที่ส่งไปแล้ว (ระหว่างส่งอาจมีการเปลี่ยนใหม่เข้ามา)
+            for key, isStarred in stars.items():
+                if self.__pendingStars.get(key) == isStarred:
+                    del self.__pendingStars[key]
+
+            self.__save()
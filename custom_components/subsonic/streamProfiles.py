@@ -0,0 +1,167 @@
+from __future__ import annotations
+
+from dataclasses import dataclass, replace
+from typing import Mapping
+
+from homeassistant.core import HomeAssistant
+from homeassistant.helpers import entity_registry as er
+
+from .capabilities import ServerCapabilities
+
+CONF_LOSSLESS_PLAYERS = "lossless_players"
+CONF_STANDARD_PLAYERS = "standard_players"
+CONF_LOW_PLAYERS = "low_players"
+CONF_HLS = "hls"
+CONF_HLS_PLAYERS = "hls_players"
+CONF_HLS_BITRATES = "hls_bitrates"
+
+# pseudo format: stream through hls.m3u8 instead of stream.view
+HLS_FORMAT = "hls"
+HLS_MIME_TYPE = "application/vnd.apple.mpegurl"
+HLS_BITRATES = (64, 96, 128, 192, 256, 320)
+DEFAULT_HLS_LADDER = (64, 128, 192, 320)
+
+MIME_TYPES = {
+    "mp3": "audio/mpeg",
+    "mpeg": "audio/mpeg",
+    "flac": "audio/flac",
+    "m4a": "audio/mp4",
+    "mp4": "audio/mp4",
+    "aac": "audio/aac",
+    "ogg": "audio/ogg",
+    "oga": "audio/ogg",
+    "opus": "audio/ogg",
+    "wav": "audio/wav",
+}
+
+
+def getMimeType(song: Mapping, suffix: str | None = None) -> str:
+    """Return the MIME type of a song, or of ``suffix`` when given."""
+    if suffix is None:
+        if song.get("contentType"):
+            return song["contentType"]
+        suffix = song.get("suffix")
+
+    return MIME_TYPES.get((suffix or "").lower(), "music")
+
+
+@dataclass(frozen=True)
+class StreamProfile:
+    """How songs are streamed to one kind of player.
+
+    Originals whose suffix is in ``passthrough`` and whose bitrate fits in
+    ``passthroughMaxBitRate`` (no limit when None) are streamed untouched
+    (``format=raw``); everything else is transcoded to ``format``/``maxBitRate``.
+    With ``hls`` every song goes through the server's HLS playlist instead,
+    its bitrate ladder capped at ``maxBitRate``.
+    """
+
+    name: str
+    format: str
+    maxBitRate: int
+    passthrough: frozenset[str] = frozenset()
+    passthroughMaxBitRate: int | None = None
+    hls: bool = False
+
+    def select(self, song: Mapping) -> tuple[str, int | None, str]:
+        """Return (format, maxBitRate, mime_type) to stream ``song`` with."""
+        if self.hls:
+            return HLS_FORMAT, self.maxBitRate, HLS_MIME_TYPE
+
+        suffix = (song.get("suffix") or "").lower()
+
+        try:
+            bitRate = int(song.get("bitRate") or 0)
+        except (TypeError, ValueError):
+            bitRate = 0
+
+        if (suffix in self.passthrough
+            and (self.passthroughMaxBitRate is None
+                 or 0 < bitRate <= self.passthroughMaxBitRate)):
+            return "raw", None, getMimeType(song)
+
+        return self.format, self.maxBitRate, getMimeType(song, self.format)
+
+
+PROFILES: dict[str, StreamProfile] = {
+    "lossless": StreamProfile(
+        "lossless", "mp3", 320,
+        frozenset({"flac", "wav", "mp3", "m4a", "aac", "ogg", "oga", "opus"}),
+    ),
+    "standard": StreamProfile(
+        "standard", "mp3", 192, frozenset({"mp3", "m4a", "aac"}), 192
+    ),
+    "low": StreamProfile(
+        "low", "mp3", 96, frozenset({"mp3", "m4a", "aac", "opus"}), 96
+    ),
+}
+
+DEFAULT_PROFILE = PROFILES["standard"]
+
+# players that decode lossless originals by themselves
+PLATFORM_PROFILES = {
+    "cast": "lossless",
+    "sonos": "lossless",
+    "squeezebox": "lossless",
+    "music_assistant": "lossless",
+}
+
+# players that play HLS playlists by themselves
+HLS_PLATFORMS = {"cast", "apple_tv", "kodi"}
+
+PROFILE_OPTIONS = {
+    CONF_LOSSLESS_PLAYERS: "lossless",
+    CONF_STANDARD_PLAYERS: "standard",
+    CONF_LOW_PLAYERS: "low",
+}
+
+
+def getHlsLadder(options: Mapping | None, maxBitRate: int | None) -> list[int]:
+    """Return the HLS bitrates (kbps) from the options, up to ``maxBitRate``."""
+    ladder = sorted(
+        {int(b) for b in ((options or {}).get(CONF_HLS_BITRATES) or DEFAULT_HLS_LADDER)}
+    )
+
+    if maxBitRate:
+        # อย่างน้อยต้องเหลือหนึ่งขั้น
+        ladder = [b for b in ladder if b <= maxBitRate] or [maxBitRate]
+
+    return ladder
+
+
+def resolvePlayerProfile(
+    hass: HomeAssistant,
+    entityId: str | None,
+    options: Mapping | None = None,
+    capabilities: ServerCapabilities | None = None,
+) -> StreamProfile:
+    """Pick the stream profile for a media_player.
+
+    Players listed in the entry options win; otherwise the player's
+    integration decides, falling back to the standard mp3 profile. When HLS
+    is enabled and the server has been seen to stream it, players known to
+    play it get the HLS flavour of that profile.
+    """
+    if not entityId:
+        return DEFAULT_PROFILE
+
+    registryEntry = er.async_get(hass).async_get(entityId)
+    platform = registryEntry.platform if registryEntry is not None else None
+
+    profile = DEFAULT_PROFILE
+    if platform in PLATFORM_PROFILES:
+        profile = PROFILES[PLATFORM_PROFILES[platform]]
+
+    for option, profileName in PROFILE_OPTIONS.items():
+        if options and entityId in (options.get(option) or []):
+            profile = PROFILES[profileName]
+            break
+
+    # ต้องเปิดเองใน options และ server ต้องตอบ hls.m3u8 ได้จริง
+    serverHls = capabilities is not None and bool(capabilities.hls)
+    if serverHls and options and options.get(CONF_HLS, False) and (
+        platform in HLS_PLATFORMS or entityId in (options.get(CONF_HLS_PLAYERS) or [])
+    ):
+        profile = replace(profile, name=f"{profile.name}+hls", hls=True)
+
+    return profile
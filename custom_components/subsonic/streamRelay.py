@@ -0,0 +1,493 @@
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import os
+import re
+from collections import OrderedDict
+from dataclasses import dataclass, field
+
+import aiohttp
+from aiohttp import hdrs, web
+
+from homeassistant.components.http import HomeAssistantView
+from homeassistant.components.media_player.browse_media import (
+    async_process_play_media_url,
+)
+from homeassistant.core import HomeAssistant
+
+from .const import DOMAIN, LOGGER
+from .streamProfiles import MIME_TYPES
+from .subsonicApi import SubsonicApi
+
+CONF_STREAM_RELAY = "stream_relay"
+CONF_STREAM_CACHE_SIZE = "stream_cache_size"
+
+DEFAULT_CACHE_SIZE = 1024  # MB
+CHUNK_SIZE = 256 * 1024
+# seeking further than this past the downloaded part goes straight upstream
+SEEK_AHEAD_LIMIT = 4 * 1024 * 1024
+
+RANGE_PATTERN = re.compile(r"^bytes=(\d*)-(\d*)$")
+
+EXTENSIONS = {
+    "audio/mpeg": "mp3",
+    "audio/mp3": "mp3",
+    "audio/flac": "flac",
+    "audio/x-flac": "flac",
+    "audio/mp4": "m4a",
+    "audio/aac": "aac",
+    "audio/ogg": "ogg",
+    "audio/wav": "wav",
+    "audio/x-wav": "wav",
+}
+
+
+def getContentType(path: str) -> str:
+    extension = os.path.splitext(path)[1].lstrip(".")
+    return MIME_TYPES.get(extension, "application/octet-stream")
+
+
+@dataclass
+class _Fill:
+    """A track being downloaded into the cache."""
+
+    key: str
+    path: str
+    contentType: str
+    total: int | None
+    written: int = 0
+    done: bool = False
+    failed: bool = False
+    changed: asyncio.Condition = field(default_factory=asyncio.Condition)
+
+    async def async_wait_for(self, position: int) -> None:
+        """Wait until ``position`` is on disk or the download ended."""
+        async with self.changed:
+            await self.changed.wait_for(
+                lambda: self.written > position or self.done or self.failed
+            )
+
+    async def async_update(self, **changes) -> None:
+        async with self.changed:
+            for name, value in changes.items():
+                setattr(self, name, value)
+            self.changed.notify_all()
+
+
+class TrackCache:
+    """Size-capped LRU of relayed tracks on disk, keyed by song/format/bitrate."""
+
+    def __init__(self, hass: HomeAssistant, directory: str, maxBytes: int) -> None:
+        self.hass = hass
+        self.directory = directory
+        self.maxBytes = maxBytes
+        self.__files: OrderedDict[str, tuple[str, int]] = OrderedDict()
+        self.__size = 0
+
+    @staticmethod
+    def key(songId: str, audioFormat: str, maxBitRate: int) -> str:
+        return hashlib.sha1(f"{songId}/{audioFormat}/{maxBitRate}".encode()).hexdigest()
+
+    def __scan(self) -> list[tuple[float, str, str, int]]:
+        os.makedirs(self.directory, exist_ok=True)
+        found = []
+
+        for entry in os.scandir(self.directory):
+            if not entry.is_file():
+                continue
+
+            if entry.name.endswith(".part"):
+                # ของค้างจากครั้งก่อน ดาวน์โหลดไม่จบ
+                os.remove(entry.path)
+                continue
+
+            stat = entry.stat()
+            key = entry.name.split(".", 1)[0]
+            found.append((stat.st_mtime, key, entry.path, stat.st_size))
+
+        return sorted(found)
+
+    async def async_setup(self) -> None:
+        """Index the files left by a previous run, oldest first."""
+        for _mtime, key, path, size in await self.hass.async_add_executor_job(self.__scan):
+            self.__files[key] = (path, size)
+            self.__size += size
+
+        await self.async_evict()
+
+    def get(self, key: str) -> str | None:
+        """Return the cached file of ``key`` and mark it recently used."""
+        if key not in self.__files:
+            return None
+
+        self.__files.move_to_end(key)
+        path = self.__files[key][0]
+        self.hass.async_add_executor_job(self.__touch, path)
+
+        return path
+
+    @staticmethod
+    def __touch(path: str) -> None:
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+
+    @staticmethod
+    def __remove(path: str) -> None:
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+    async def async_add(self, key: str, path: str, size: int) -> None:
+        self.__files[key] = (path, size)
+        self.__size += size
+
+        await self.async_evict()
+
+    async def async_evict(self) -> None:
+        while self.__size > self.maxBytes and len(self.__files) > 1:
+            _key, (path, size) = self.__files.popitem(last=False)
+            self.__size -= size
+            await self.hass.async_add_executor_job(self.__remove, path)
+
+
+class StreamRelay:
+    """Relay ``stream.view`` through Home Assistant and keep the tracks on disk.
+
+    A track is downloaded once into the cache; clients asking for it while it
+    is still downloading are served from the partial file as data arrives.
+    """
+
+    def __init__(self, hass: HomeAssistant, api: SubsonicApi, entryId: str, cacheSize: int) -> None:
+        self.hass = hass
+        self.api = api
+        self.entryId = entryId
+        self.cache = TrackCache(
+            hass, hass.config.path(f"{DOMAIN}_cache", entryId), int(cacheSize * 1024 * 1024)
+        )
+        self.__fills: dict[str, _Fill] = {}
+        self.__starting: dict[str, asyncio.Task] = {}
+
+    async def async_setup(self) -> None:
+        await self.cache.async_setup()
+
+    def getSongStreamUrl(
+        self, id: str, audio_format: str | None = None, max_bitrate: int | None = None
+    ) -> str:
+        """Return a signed Home Assistant URL that relays the song."""
+        path = (
+            f"/api/{DOMAIN}/stream/{self.entryId}/{id}"
+            f"/{audio_format or 'raw'}/{max_bitrate or 0}"
+        )
+
+        return async_process_play_media_url(self.hass, path)
+
+    # ------------------------------------------------------------------
+    # download into the cache
+    # ------------------------------------------------------------------
+
+    def __upstreamUrl(self, songId: str, audioFormat: str, maxBitRate: int) -> str:
+        return self.api.getSongStreamUrl(songId, audioFormat, maxBitRate or None)
+
+    async def __async_open_upstream(
+        self, url: str, headers: dict | None = None
+    ) -> aiohttp.ClientResponse:
+        return await self.api.session.get(
+            url,
+            headers=headers,
+            raise_for_status=True,
+            timeout=aiohttp.ClientTimeout(total=None, sock_connect=10, sock_read=60),
+        )
+
+    async def __async_start_fill(
+        self, key: str, songId: str, audioFormat: str, maxBitRate: int
+    ) -> _Fill:
+        response = await self.__async_open_upstream(
+            self.__upstreamUrl(songId, audioFormat, maxBitRate)
+        )
+
+        contentType = response.headers.get(hdrs.CONTENT_TYPE, "").split(";")[0].strip()
+        extension = EXTENSIONS.get(contentType, "bin")
+
+        fill = _Fill(
+            key=key,
+            path=os.path.join(self.cache.directory, f"{key}.{extension}.part"),
+            contentType=contentType or "application/octet-stream",
+            total=response.content_length,
+        )
+
+        # สร้างไฟล์ก่อน เพื่อให้ client ที่มาระหว่างดาวน์โหลดเปิดไฟล์ได้ทันที
+        try:
+            file = await self.hass.async_add_executor_job(open, fill.path, "wb")
+        except OSError:
+            response.release()
+            raise
+
+        self.__fills[key] = fill
+        self.hass.async_create_background_task(
+            self.__async_fill(fill, file, response), f"{DOMAIN}_relay_{songId}"
+        )
+
+        return fill
+
+    async def __async_fill(self, fill: _Fill, file, response: aiohttp.ClientResponse) -> None:
+        partPath = fill.path
+
+        try:
+            async for chunk in response.content.iter_chunked(CHUNK_SIZE):
+                await self.hass.async_add_executor_job(self.__write, file, chunk)
+                await fill.async_update(written=fill.written + len(chunk))
+
+            await self.hass.async_add_executor_job(file.close)
+
+            if fill.total is not None and fill.written != fill.total:
+                raise IOError(f"got {fill.written} of {fill.total} bytes")
+
+            finalPath = partPath[: -len(".part")]
+            await self.hass.async_add_executor_job(self.__publish, partPath, finalPath)
+
+            fill.path = finalPath
+            await self.hass.async_add_executor_job(self.__removeQuietly, partPath)
+            await self.cache.async_add(fill.key, finalPath, fill.written)
+            await fill.async_update(total=fill.written, done=True)
+
+        except Exception as err:
+            LOGGER.warning("Relay download of %s failed: %s", partPath, err)
+            await fill.async_update(failed=True)
+            await self.hass.async_add_executor_job(file.close)
+            await self.hass.async_add_executor_job(self.__removeQuietly, partPath)
+
+        finally:
+            response.release()
+            self.__fills.pop(fill.key, None)
+
+    @staticmethod
+    def __write(file, chunk: bytes) -> None:
+        file.write(chunk)
+        file.flush()
+
+    @staticmethod
+    def __publish(partPath: str, finalPath: str) -> None:
+        # hard link: ทั้งสองชื่อใช้ได้ระหว่างเปลี่ยน path ให้ client ที่กำลังอ่านอยู่
+        try:
+            os.link(partPath, finalPath)
+        except OSError:
+            os.replace(partPath, finalPath)
+
+    @staticmethod
+    def __removeQuietly(path: str) -> None:
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+    # ------------------------------------------------------------------
+    # serving
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def __parseRange(header: str | None, total: int | None) -> tuple[int, int | None] | None:
+        """Return (start, end) of a single byte range, end inclusive."""
+        if not header:
+            return None
+
+        match = RANGE_PATTERN.match(header.strip())
+        if match is None or match.group(0) == "bytes=-":
+            return None
+
+        start, end = match.groups()
+
+        if not start:
+            # suffix range: the last N bytes
+            if total is None:
+                return None
+            return max(total - int(end), 0), total - 1
+
+        return int(start), int(end) if end else None
+
+    async def async_serve(
+        self, request: web.Request, songId: str, audioFormat: str, maxBitRate: int
+    ) -> web.StreamResponse:
+        key = TrackCache.key(songId, audioFormat, maxBitRate)
+
+        path = self.cache.get(key)
+        if path is not None:
+            # FileResponse จัดการ Range / HEAD ให้เองทั้งหมด
+            return web.FileResponse(
+                path, headers={hdrs.CONTENT_TYPE: getContentType(path)}
+            )
+
+        fill = self.__fills.get(key)
+        if fill is None:
+            # request พร้อมกันหลายตัวใช้การดาวน์โหลดเดียวกัน
+            starting = self.__starting.get(key)
+            if starting is None:
+                starting = self.hass.async_create_task(
+                    self.__async_start_fill(key, songId, audioFormat, maxBitRate)
+                )
+                self.__starting[key] = starting
+                starting.add_done_callback(lambda _task: self.__starting.pop(key, None))
+
+            try:
+                fill = await asyncio.shield(starting)
+            except Exception as err:
+                LOGGER.error("Cannot relay song %s: %s", songId, err)
+                raise web.HTTPBadGateway() from err
+
+        byteRange = self.__parseRange(request.headers.get(hdrs.RANGE), fill.total)
+
+        if byteRange is not None and fill.total is not None:
+            start, end = byteRange
+            end = fill.total - 1 if end is None else min(end, fill.total - 1)
+
+            if start > end:
+                raise web.HTTPRequestRangeNotSatisfiable(
+                    headers={hdrs.CONTENT_RANGE: f"bytes */{fill.total}"}
+                )
+
+            if start > fill.written + SEEK_AHEAD_LIMIT:
+                return await self.__async_serve_upstream(
+                    request, songId, audioFormat, maxBitRate, fill, start, end
+                )
+
+            return await self.__async_serve_fill(request, fill, start, end)
+
+        # ยังไม่รู้ขนาดไฟล์ (transcode) → ส่งทั้งไฟล์ตั้งแต่ต้นตามที่ดาวน์โหลดได้
+        return await self.__async_serve_fill(request, fill, 0, None)
+
+    async def __async_serve_fill(
+        self, request: web.Request, fill: _Fill, start: int, end: int | None
+    ) -> web.StreamResponse:
+        headers = {
+            hdrs.CONTENT_TYPE: fill.contentType,
+            hdrs.ACCEPT_RANGES: "bytes" if fill.total is not None else "none",
+        }
+
+        if end is not None:
+            headers[hdrs.CONTENT_LENGTH] = str(end - start + 1)
+            if start > 0 or end < fill.total - 1:
+                headers[hdrs.CONTENT_RANGE] = f"bytes {start}-{end}/{fill.total}"
+
+        response = web.StreamResponse(
+            status=206 if hdrs.CONTENT_RANGE in headers else 200, headers=headers
+        )
+        await response.prepare(request)
+
+        if request.method == "HEAD":
+            return response
+
+        file = None
+        position = start
+
+        try:
+            while end is None or position <= end:
+                await fill.async_wait_for(position)
+
+                if fill.failed or position >= fill.written:
+                    break
+
+                if file is None:
+                    file = await self.__async_open_fill(fill)
+
+                size = min(CHUNK_SIZE, fill.written - position)
+                if end is not None:
+                    size = min(size, end - position + 1)
+
+                chunk = await self.hass.async_add_executor_job(
+                    self.__readAt, file, position, size
+                )
+                if not chunk:
+                    break
+
+                await response.write(chunk)
+                position += len(chunk)
+        finally:
+            if file is not None:
+                await self.hass.async_add_executor_job(file.close)
+
+        await response.write_eof()
+        return response
+
+    async def __async_open_fill(self, fill: _Fill):
+        try:
+            return await self.hass.async_add_executor_job(open, fill.path, "rb")
+        except FileNotFoundError:
+            # ไฟล์เพิ่งถูกย้ายจาก .part ไปชื่อจริง
+            return await self.hass.async_add_executor_job(open, fill.path, "rb")
+
+    @staticmethod
+    def __readAt(file, position: int, size: int) -> bytes:
+        file.seek(position)
+        return file.read(size)
+
+    async def __async_serve_upstream(
+        self,
+        request: web.Request,
+        songId: str,
+        audioFormat: str,
+        maxBitRate: int,
+        fill: _Fill,
+        start: int,
+        end: int,
+    ) -> web.StreamResponse:
+        """Serve a far seek directly from the server, the cache keeps filling."""
+        upstream = await self.__async_open_upstream(
+            self.__upstreamUrl(songId, audioFormat, maxBitRate),
+            headers={hdrs.RANGE: f"bytes={start}-{end}"},
+        )
+
+        try:
+            response = web.StreamResponse(
+                status=206,
+                headers={
+                    hdrs.CONTENT_TYPE: fill.contentType,
+                    hdrs.ACCEPT_RANGES: "bytes",
+                    hdrs.CONTENT_LENGTH: str(end - start + 1),
+                    hdrs.CONTENT_RANGE: f"bytes {start}-{end}/{fill.total}",
+                },
+            )
+            await response.prepare(request)
+
+            if request.method != "HEAD":
+                async for chunk in upstream.content.iter_chunked(CHUNK_SIZE):
+                    await response.write(chunk)
+        finally:
+            upstream.release()
+
+        await response.write_eof()
+        return response
+
+
+class SubsonicStreamView(HomeAssistantView):
+    """Relay Subsonic streams with HTTP Range support."""
+
+    url = f"/api/{DOMAIN}/stream/{{entry_id}}/{{song_id}}/{{audio_format}}/{{max_bitrate}}"
+    name = f"api:{DOMAIN}:stream"
+
+    def __init__(self, hass: HomeAssistant) -> None:
+        self.hass = hass
+
+    async def get(
+        self,
+        request: web.Request,
+        entry_id: str,
+        song_id: str,
+        audio_format: str,
+        max_bitrate: str,
+    ) -> web.StreamResponse:
+        data = self.hass.data.get(DOMAIN, {}).get(entry_id)
+
+        if data is None or data.relay is None:
+            raise web.HTTPNotFound()
+
+        try:
+            maxBitRate = int(max_bitrate)
+        except ValueError as err:
+            raise web.HTTPBadRequest() from err
+
+        return await data.relay.async_serve(request, song_id, audio_format, maxBitRate)
+
+    head = get
@@ -2,18 +2,51 @@ import socket
 import aiohttp
 import asyncio
 import hashlib
+import json
 import secrets
 import random
-from typing import Self
+import time
+from typing import Any, AsyncIterator, Callable, Self
 from aiohttp import hdrs
-from .const import LOGGER
-from dataclasses import dataclass
+from .capabilities import (
+    ERROR_MISSING_PARAMETER,
+    EXT_API_KEY,
+    EXT_FORM_POST,
+    FORM_POST_MIN_PARAMS,
+    ServerCapabilities,
+    parseVersion,
+)
+from .const import GENRE_PAGE_SIZE, LOGGER
+from .endpointPool import EndpointPool, LATENCY_MAX_BYTES
+from .requestScheduler import RequestScheduler
+from collections import OrderedDict
+from dataclasses import dataclass, field, replace
+from .streamProfiles import DEFAULT_PROFILE, StreamProfile
 from .xmlHelper import getAttributes, \
     getTagAttributes, \
     getTagsAttributesToList, \
+    getTagsChildTexts, \
     getTagsTexts
 
 
+# listings kept parsed for conditional / unchanged responses
+LISTING_CACHE_SIZE = 32
+# requests that change something on the server, never sent twice on failover
+WRITE_METHODS = frozenset({"scrobble", "star", "unstar", "setRating", "jukeboxControl"})
+
+
+class SubsonicConnectionError(Exception):
+    """The server could not be reached (timeout, DNS, refused connection)."""
+
+
+@dataclass
+class _Listing:
+    parsed: Any
+    digest: str
+    etag: str | None = None
+    lastModified: str | None = None
+
+
 @dataclass
 class SubsonicApi:
 
@@ -22,10 +55,37 @@ class SubsonicApi:
     requestTimeout: float = 8.0
     apiVersion: str = "1.16.1"
     session: aiohttp.client.ClientSession | None = None
+    songIndexSize: int = 10000
+    scheduler: RequestScheduler = field(default_factory=RequestScheduler, repr=False)
+    # several base URLs of the same server (LAN / WAN); None → config url only
+    endpoints: EndpointPool | None = field(default=None, repr=False)
+    capabilities: ServerCapabilities = field(default_factory=ServerCapabilities, repr=False)
+    __songs: OrderedDict = field(default_factory=OrderedDict, init=False, repr=False)
+    __listings: OrderedDict = field(default_factory=OrderedDict, init=False, repr=False)
+    __coverUrls: OrderedDict = field(default_factory=OrderedDict, init=False, repr=False)
+    # music folder id → (lastModified, top level entries) of getIndexes
+    __indexes: dict = field(default_factory=dict, init=False, repr=False)
+    __coverBase: str | None = field(default=None, init=False, repr=False)
+    # attributes of the last ping answer (version, type, openSubsonic, ...)
+    __pingInfo: dict = field(default_factory=dict, init=False, repr=False)
+    __useApiKey: bool = field(default=False, init=False, repr=False)
+    # called with the endpoint name when a listing came back different
+    onListingChanged: Callable[[str, dict | None], None] | None = field(default=None, repr=False)
         
     @property
     def url(self) -> str:
+        if self.endpoints is not None:
+            return self.endpoints.best
+
         return self.__getProperty("url")
+
+    @property
+    def baseUrls(self) -> list[str]:
+        """Every base URL this server is reached through."""
+        if self.endpoints is not None:
+            return list(self.endpoints.urls)
+
+        return [self.url.rstrip("/")]
     
     @property
     def user(self) -> str:
@@ -35,6 +95,10 @@ class SubsonicApi:
     def password(self) -> str:
         return self.__getProperty("password")
 
+    @property
+    def apiKey(self) -> str | None:
+        return self.__getProperty("api_key")
+
     @property
     def salt(self) -> str:
         return secrets.token_hex(5)
@@ -48,6 +112,23 @@ class SubsonicApi:
         
         return self.config[property]
 
+    def rememberSongs(self, songs: list[dict]) -> None:
+        """Keep metadata of listed songs, so resolving them needs no request."""
+        for song in songs:
+            songId = song.get("id")
+            if not songId:
+                continue
+
+            self.__songs[songId] = song
+            self.__songs.move_to_end(songId)
+
+        while len(self.__songs) > self.songIndexSize:
+            self.__songs.popitem(last=False)
+
+    def getCachedSong(self, id: str) -> dict | None:
+        """Return metadata of a song seen in an earlier listing, if any."""
+        return self.__songs.get(id)
+
     def __generateToken(self, password: str, salt: str) -> str:
         return hashlib.md5((password + salt).encode()).hexdigest()
 
@@ -59,54 +140,181 @@ class SubsonicApi:
         return self.session
     
     def __getRequestParams(self, params):
-        s = self.salt
-
-        p = {
-            "u": self.user,
-            "t": self.__generateToken(self.password, s),
-            "s": s,
-            "v": self.apiVersion,
-            "c": "HomeAssistant"
-        }
+        if self.__useApiKey:
+            # OpenSubsonic apiKey: ไม่ต้องส่ง u และไม่ต้องคำนวณ md5 ทุก request
+            p = {
+                "apiKey": self.apiKey,
+                "v": self.apiVersion,
+                "c": "HomeAssistant"
+            }
+        else:
+            s = self.salt
+
+            p = {
+                "u": self.user,
+                "t": self.__generateToken(self.password, s),
+                "s": s,
+                "v": self.apiVersion,
+                "c": "HomeAssistant"
+            }
 
         if params is not None:
             p.update(params)
 
         return p
 
+    @staticmethod
+    def __expandParams(params: dict) -> list[tuple[str, str]]:
+        # list value → ส่ง key ซ้ำหลายครั้ง (เช่น scrobble ที่มีหลาย id)
+        items = []
+
+        for key, value in params.items():
+            values = value if isinstance(value, (list, tuple)) else [value]
+            items.extend((key, str(v)) for v in values)
+
+        return items
+
     async def __request(self, method, path, params=None):
-        url = f"{self.url}/rest/{path}.view"
-        p = self.__getRequestParams(params)
+        _, _, body = await self.__send(method, path, params)
+        return body
+
+    async def __send(self, method, path, params=None, extraHeaders=None):
+        base = self.url
+
+        try:
+            return await self.__sendTo(base, method, path, params, extraHeaders)
+        except SubsonicConnectionError:
+            if self.endpoints is None:
+                raise
+
+            # endpoint นี้ใช้ไม่ได้ → ลองตัวที่ดีที่สุดที่เหลือทันทีหนึ่งครั้ง
+            self.endpoints.markDown(base)
+            if self.endpoints.best == base:
+                raise
+
+            # timeout อาจแปลว่า server ทำไปแล้ว → ส่งซ้ำได้เฉพาะ request ที่อ่านอย่างเดียว
+            if method != "GET" or path in WRITE_METHODS:
+                raise
+
+        base = self.endpoints.best
+        LOGGER.debug("Retrying %s on %s", path, base)
+
+        try:
+            return await self.__sendTo(base, method, path, params, extraHeaders)
+        except SubsonicConnectionError:
+            self.endpoints.markDown(base)
+            raise
+
+    async def __sendTo(self, base, method, path, params=None, extraHeaders=None):
+        # hls.m3u8 มีนามสกุลของมันเองอยู่แล้ว
+        url = f"{base}/rest/{path}" if "." in path else f"{base}/rest/{path}.view"
+        p = self.__expandParams(self.__getRequestParams(params))
 
         headers = {
             hdrs.USER_AGENT: self.userAgent
         }
+        if extraHeaders:
+            headers.update(extraHeaders)
 
         s = self.__getSession()
 
-        try:
-            async with asyncio.timeout(self.requestTimeout):
-                response = await s.request(method, 
-                                        url, 
-                                        headers=headers, 
-                                        params=p,
-                                        raise_for_status=True)
-                
-                content_type = response.headers.get("Content-Type", "")
+        # parameter เยอะ (เช่น star / scrobble หลายเพลง) → ส่งเป็น form แทน query string
+        form = None
+        if (method == "GET"
+            and len(p) > FORM_POST_MIN_PARAMS
+            and self.capabilities.supports(EXT_FORM_POST)):
+            method, form, p = "POST", p, None
 
-                if "application/json" in content_type:
-                    return await response.json()
-                else:
-                    text = await response.text()
-                    return text
+        try:
+            # รอคิวตาม priority ก่อน (timeout นับเฉพาะตอนคุยกับ server)
+            async with self.scheduler.slot():
+                started = time.monotonic()
+
+                async with asyncio.timeout(self.requestTimeout):
+                    response = await s.request(method, 
+                                            url, 
+                                            headers=headers, 
+                                            params=p,
+                                            data=form,
+                                            raise_for_status=True)
+
+                    if response.status == 304:
+                        body = None
+                    elif "application/json" in response.headers.get("Content-Type", ""):
+                        body = await response.json()
+                    else:
+                        body = await response.text()
+
+                # คำตอบเล็ก ๆ (ping, 304, error) คือการวัด latency ของ endpoint นั้นไปในตัว
+                # listing ใหญ่ ๆ ไม่นับ เพราะเวลาส่วนใหญ่คือเวลาโหลด body
+                if self.endpoints is not None:
+                    if body is None:
+                        size = 0
+                    elif isinstance(body, str):
+                        size = len(body)
+                    else:
+                        size = response.content_length
+
+                    if path == "ping" or (size is not None and size <= LATENCY_MAX_BYTES):
+                        self.endpoints.record(base, time.monotonic() - started)
+
+                return response.status, response.headers, body
                 
         except asyncio.TimeoutError as exception:
             LOGGER.error("Timeout error")
-            raise Exception("Timeout error") from exception
+            raise SubsonicConnectionError("Timeout error") from exception
+
+        except aiohttp.ClientResponseError as exception:
+            # server ตอบกลับมาแล้ว แค่ status ไม่ ok → ไม่ใช่ปัญหาของ endpoint
+            LOGGER.error("Navidrome answered %s for %s", exception.status, path)
+            raise Exception(f"Navidrome answered {exception.status}") from exception
         
         except (aiohttp.ClientError, socket.gaierror) as exception:
             LOGGER.error("Error connecting to Navidrome")
-            raise Exception("Error connecting to Navidrome") from exception
+            raise SubsonicConnectionError("Error connecting to Navidrome") from exception
+
+    async def __requestListing(self, path: str, parse: Callable[[Any], Any], params=None):
+        """GET a listing and parse it, reusing the last parse if nothing changed.
+
+        ETag / Last-Modified from the previous answer are sent back as
+        conditional headers; on 304, or when the body hashes the same as
+        before (servers without validators), the earlier objects are returned
+        without parsing. Returned lists are copies, the items are shared.
+        """
+        key = (path, tuple(self.__expandParams(params or {})))
+        cached: _Listing | None = self.__listings.get(key)
+
+        headers = {}
+        if cached is not None:
+            if cached.etag:
+                headers[hdrs.IF_NONE_MATCH] = cached.etag
+            if cached.lastModified:
+                headers[hdrs.IF_MODIFIED_SINCE] = cached.lastModified
+
+        status, responseHeaders, body = await self.__send("GET", path, params, headers)
+
+        if status == 304 and cached is not None:
+            LOGGER.debug("%s not modified, reusing parsed listing", path)
+        else:
+            raw = body if isinstance(body, str) else json.dumps(body, sort_keys=True)
+            digest = hashlib.sha1(raw.encode()).hexdigest()
+
+            if cached is None or cached.digest != digest:
+                if cached is not None and self.onListingChanged is not None:
+                    self.onListingChanged(path, params)
+
+                cached = _Listing(parsed=parse(body), digest=digest)
+
+            cached.etag = responseHeaders.get(hdrs.ETAG)
+            cached.lastModified = responseHeaders.get(hdrs.LAST_MODIFIED)
+
+        self.__listings[key] = cached
+        self.__listings.move_to_end(key)
+        while len(self.__listings) > LISTING_CACHE_SIZE:
+            self.__listings.popitem(last=False)
+
+        parsed = cached.parsed
+        return list(parsed) if isinstance(parsed, list) else parsed
 
     async def close(self) -> None:
         """Close open client session."""
@@ -118,43 +326,173 @@ class SubsonicApi:
 
         ping = getAttributes(pingResponse)
         LOGGER.info(f"Ping: {ping}")
+        self.__pingInfo = ping
 
         if "status" not in ping:
             return False
         
         return ping["status"] == "ok"
+
+    async def getOpenSubsonicExtensions(self) -> dict[str, list[int]]:
+        response = await self.__request("GET", "getOpenSubsonicExtensions")
+        extensions: dict[str, list[int]] = {}
+
+        for attributes, versions in getTagsChildTexts(response, "openSubsonicExtensions", "versions"):
+            if attributes.get("name"):
+                extensions[attributes["name"]] = [int(v) for v in versions if v and v.isdigit()]
+
+        return extensions
+
+    async def detectCapabilities(
+        self, cached: ServerCapabilities | None = None, hls: bool = False
+    ) -> ServerCapabilities:
+        """Work out what the server supports, from the last ping answer.
+
+        Extensions are only asked for when the server says it speaks
+        OpenSubsonic, and ``cached`` is reused while the server reports the
+        same type and version. HLS support is only probed when ``hls`` asks
+        for it. Anything unsupported, or a failing apiKey, leaves the plain
+        Subsonic behaviour in place.
+        """
+        info = self.__pingInfo
+        capabilities = ServerCapabilities(
+            apiVersion=info.get("version"),
+            openSubsonic=info.get("openSubsonic") == "true",
+            serverType=info.get("type"),
+            serverVersion=info.get("serverVersion"),
+        )
+
+        if cached is not None and cached.sameServer(capabilities):
+            capabilities = replace(cached)
+        elif capabilities.openSubsonic:
+            try:
+                capabilities.extensions = await self.getOpenSubsonicExtensions()
+            except Exception as err:
+                LOGGER.debug("getOpenSubsonicExtensions failed, using plain Subsonic: %s", err)
+
+        if hls and capabilities.hls is None:
+            capabilities.hls = await self.probeHls()
+
+        self.capabilities = capabilities
+
+        # server เก่ากว่า → ใช้ version ของ server (ไม่งั้นจะโดน error 30)
+        if capabilities.apiVersion and parseVersion(capabilities.apiVersion) < parseVersion(self.apiVersion):
+            self.apiVersion = capabilities.apiVersion
+
+        if self.apiKey and capabilities.supports(EXT_API_KEY):
+            self.__useApiKey = True
+            try:
+                accepted = await self.ping()
+            except Exception:
+                accepted = False
+
+            if not accepted:
+                LOGGER.warning("The server refused the API key, using the password instead")
+                self.__useApiKey = False
+
+        LOGGER.debug(
+            "Subsonic server %s %s (API %s), extensions: %s, HLS: %s",
+            capabilities.serverType,
+            capabilities.serverVersion,
+            self.apiVersion,
+            sorted(capabilities.extensions),
+            capabilities.hls,
+        )
+
+        return capabilities
+
+    async def probeHls(self) -> bool | None:
+        """Return whether the server has ``hls.m3u8``, None if it could not be asked.
+
+        The playlist is asked for without a song id: a server that streams
+        HLS answers with a missing parameter error, the others (Navidrome,
+        gonic) answer 404/501 or with another error.
+        """
+        try:
+            response = await self.__request("GET", "hls.m3u8")
+        except SubsonicConnectionError:
+            return None
+        except Exception:
+            return False
+
+        try:
+            error = getTagAttributes(response, "error")
+        except Exception:
+            # ไม่ใช่ XML เลย (เช่นได้ playlist กลับมา) → มี hls.m3u8 แน่นอน
+            return bool(response)
+
+        return error.get("code") == ERROR_MISSING_PARAMETER
+
+    async def probeEndpoints(self) -> dict[str, float | None]:
+        """Ping every candidate base URL, updating their measured latency.
+
+        Returns the averaged latency (seconds) per URL, None when unreachable.
+        """
+        if self.endpoints is None:
+            return {}
+
+        async def probe(base: str) -> None:
+            try:
+                await self.__sendTo(base, "GET", "ping")
+            except SubsonicConnectionError:
+                self.endpoints.markDown(base)
+            except Exception as err:
+                LOGGER.debug("Ping of %s failed: %s", base, err)
+
+        await asyncio.gather(*(probe(base) for base in self.endpoints.urls))
+
+        return {base: self.endpoints.latency(base) for base in self.endpoints.urls}
     
     async def getRadioStations(self) -> dict:
-        radioResponse = await self.__request("GET", "getInternetRadioStations")
-        radios = getTagsAttributesToList(radioResponse, "internetRadioStation")
+        radios = await self.__requestListing(
+            "getInternetRadioStations",
+            lambda response: getTagsAttributesToList(response, "internetRadioStation"),
+        )
 
         return radios
     
     async def getAlbums(self) -> list:
+        return await self.getAlbumList("alphabeticalByName", size=5000)
+
+    async def getAlbumList(self, type: str, size: int = 10, offset: int = 0) -> list:
         params = {
-            "type": "alphabeticalByName",
-            "size": 5000
+            "type": type,
+            "size": size,
+            "offset": offset
         }
-        albumsResponse = await self.__request("GET", "getAlbumList2", params)
-        albums = getTagsAttributesToList(albumsResponse, "album")
+        albums = await self.__requestListing(
+            "getAlbumList2",
+            lambda response: getTagsAttributesToList(response, "album"),
+            params,
+        )
 
         return albums
     
     async def getAlbum(self, id: str) -> dict:
+        """Return an album with its songs in ``songs``.
+
+        Goes through the listing cache, so a changed track list is reported
+        through ``onListingChanged`` like any other listing.
+        """
         params = {
             "id": id
         }
-        albumResponse = await self.__request("GET", "getAlbum", params)
-        album = getTagAttributes(albumResponse, "album")
 
-        songs = getTagsAttributesToList(albumResponse, "song")
-        album["songs"] = songs
+        def parse(response) -> dict:
+            album = getTagAttributes(response, "album")
+            album["songs"] = getTagsAttributesToList(response, "song")
+            return album
+
+        album = await self.__requestListing("getAlbum", parse, params)
+        self.rememberSongs(album["songs"])
 
-        return album
+        return {**album, "songs": list(album["songs"])}
 
     async def getPlaylists(self) -> list:
-        playlistsResponse = await self.__request("GET", "getPlaylists")
-        playlists = getTagsAttributesToList(playlistsResponse, "playlist")
+        playlists = await self.__requestListing(
+            "getPlaylists",
+            lambda response: getTagsAttributesToList(response, "playlist"),
+        )
 
         return playlists
     
@@ -167,26 +505,89 @@ class SubsonicApi:
 
         songs = getTagsAttributesToList(playlistResponse, "entry")
         playlist["songs"] = songs
+        self.rememberSongs(songs)
 
         return playlist
 
     async def getGenres(self) -> list[str]:
-        genresResponse = await self.__request("GET", "getGenres")
-        genres = getTagsTexts(genresResponse, "genre")
+        genres = await self.__requestListing(
+            "getGenres",
+            lambda response: getTagsTexts(response, "genre"),
+        )
         return genres
     
-    async def getSongsByGenre(self, id: str) -> list:
+    async def getSongsByGenre(self, id: str, count: int = GENRE_PAGE_SIZE, offset: int = 0) -> list:
+        """Return one page of the songs of a genre.
+
+        Without ``count`` servers fall back to their own default (10 on
+        Subsonic), so it is always sent.
+        """
         params = {
-            "genre": id
+            "genre": id,
+            "count": count,
+            "offset": offset
         }
         songsResponse = await self.__request("GET", "getSongsByGenre", params)
         songs = getTagsAttributesToList(songsResponse, "song")
+        self.rememberSongs(songs)
 
         return songs
+
+    async def iterSongsByGenre(
+        self, id: str, pageSize: int = GENRE_PAGE_SIZE, offset: int = 0
+    ) -> AsyncIterator[list[dict]]:
+        """Yield the songs of a genre page by page from ``offset``, until the server runs out."""
+
+        while True:
+            songs = await self.getSongsByGenre(id, count=pageSize, offset=offset)
+            if songs:
+                yield songs
+
+            if len(songs) < pageSize:
+                return
+
+            offset += pageSize
     
+    async def getRandomSongs(
+        self,
+        size: int = 10,
+        genre: str | None = None,
+        fromYear: int | None = None,
+        toYear: int | None = None,
+    ) -> list:
+        params = {
+            "size": size
+        }
+
+        if genre:
+            params["genre"] = genre
+        if fromYear:
+            params["fromYear"] = fromYear
+        if toYear:
+            params["toYear"] = toYear
+
+        songsResponse = await self.__request("GET", "getRandomSongs", params)
+        songs = getTagsAttributesToList(songsResponse, "song")
+        self.rememberSongs(songs)
+
+        return songs
+
+    async def getSimilarSongs2(self, id: str, count: int = 10) -> list:
+        params = {
+            "id": id,
+            "count": count
+        }
+        songsResponse = await self.__request("GET", "getSimilarSongs2", params)
+        songs = getTagsAttributesToList(songsResponse, "song")
+        self.rememberSongs(songs)
+
+        return songs
+
     async def getArtists(self) -> list:
-        artistsResponse = await self.__request("GET", "getArtists")
-        artists = getTagsAttributesToList(artistsResponse, "artist")
+        artists = await self.__requestListing(
+            "getArtists",
+            lambda response: getTagsAttributesToList(response, "artist"),
+        )
 
         return artists
     
@@ -203,16 +604,219 @@ class SubsonicApi:
 
         return artist
 
+    async def search3(
+        self,
+        query: str = "",
+        songCount: int = 20,
+        songOffset: int = 0,
+        albumCount: int = 0,
+        artistCount: int = 0,
+    ) -> list:
+        """Return the songs matching ``query`` (an empty query lists every song)."""
+        params = {
+            "query": query,
+            "songCount": songCount,
+            "songOffset": songOffset,
+            "albumCount": albumCount,
+            "artistCount": artistCount
+        }
+        searchResponse = await self.__request("GET", "search3", params)
+        songs = getTagsAttributesToList(searchResponse, "song")
+        self.rememberSongs(songs)
+
+        return songs
+
     async def getSong(self, id: str) -> dict:
         params = {
             "id": id
         }
         songResponse = await self.__request("GET", "getSong", params)
         song = getTagAttributes(songResponse, "song")
+        self.rememberSongs([song])
 
         return song
 
+    async def getMusicFolders(self) -> list:
+        folders = await self.__requestListing(
+            "getMusicFolders",
+            lambda response: getTagsAttributesToList(response, "musicFolder"),
+        )
+
+        return folders
+
+    async def getIndexes(self, musicFolderId: str | None = None) -> list:
+        """Return the top level directories (and loose songs) of a music folder.
+
+        The ``lastModified`` of the previous answer is sent as
+        ``ifModifiedSince``; an unchanged folder comes back empty and the
+        earlier entries are reused.
+        """
+        key = musicFolderId or ""
+        cached = self.__indexes.get(key)
+
+        params = {}
+        if musicFolderId:
+            params["musicFolderId"] = musicFolderId
+        if cached is not None:
+            params["ifModifiedSince"] = cached[0]
+
+        indexesResponse = await self.__request("GET", "getIndexes", params)
+        indexes = getTagAttributes(indexesResponse, "indexes")
+
+        artists = getTagsAttributesToList(indexesResponse, "artist")
+        songs = getTagsAttributesToList(indexesResponse, "child")
+
+        if cached is not None and not artists and not songs:
+            return list(cached[1])
+
+        for artist in artists:
+            artist["isDir"] = "true"
+        self.rememberSongs(songs)
+
+        entries = artists + songs
+
+        # ifModifiedSince ทำหน้าที่แทน digest → แจ้งเองเมื่อ folder เปลี่ยนจริง
+        if cached is not None and entries != cached[1] and self.onListingChanged is not None:
+            self.onListingChanged("getIndexes", {"musicFolderId": musicFolderId} if musicFolderId else None)
+        self.__indexes[key] = (indexes.get("lastModified", "0"), entries)
+
+        return list(entries)
+
+    async def getMusicDirectory(self, id: str) -> dict:
+        """Return a directory with its entries in ``children``.
+
+        Parsed directories are reused while the server answers the same, so
+        paging through a large directory parses it once.
+        """
+        params = {
+            "id": id
+        }
+
+        def parse(response) -> dict:
+            directory = getTagAttributes(response, "directory")
+            children = getTagsAttributesToList(response, "child")
+            self.rememberSongs([c for c in children if c.get("isDir") != "true"])
+
+            directory["children"] = children
+            return directory
+
+        return await self.__requestListing("getMusicDirectory", parse, params)
+
+    async def jukeboxControl(self, action: str, **params) -> dict:
+        """Control the server's own audio output.
+
+        ``action`` is one of get, status, set, add, skip, start, stop, clear,
+        remove, shuffle and setGain; ``params`` are passed as is (``id`` may be
+        a list, sent as repeated ids in one request). Returns the status
+        attributes, plus the queue under ``entries`` for ``get``.
+        """
+        params = {
+            "action": action,
+            **{k: v for k, v in params.items() if v is not None}
+        }
+        jukeboxResponse = await self.__request("GET", "jukeboxControl", params)
+
+        if action == "get":
+            status = getTagAttributes(jukeboxResponse, "jukeboxPlaylist")
+            entries = getTagsAttributesToList(jukeboxResponse, "entry")
+            self.rememberSongs(entries)
+            status["entries"] = entries
+        else:
+            status = getTagAttributes(jukeboxResponse, "jukeboxStatus")
+
+        return status
+
+    async def getNowPlaying(self) -> list:
+        """Return what every user of the server is playing right now."""
+        nowPlayingResponse = await self.__request("GET", "getNowPlaying")
+        entries = getTagsAttributesToList(nowPlayingResponse, "entry")
+
+        return entries
+
+    async def getStarred2(self) -> dict:
+        """Return the starred artists, albums and songs of the user."""
+        starredResponse = await self.__request("GET", "getStarred2")
+
+        songs = getTagsAttributesToList(starredResponse, "song")
+        self.rememberSongs(songs)
+
+        return {
+            "artists": getTagsAttributesToList(starredResponse, "artist"),
+            "albums": getTagsAttributesToList(starredResponse, "album"),
+            "songs": songs,
+        }
+
+    async def __starRequest(
+        self, path: str, ids: list[str], albumIds: list[str], artistIds: list[str]
+    ) -> bool:
+        params = {}
+
+        if ids:
+            params["id"] = ids
+        if albumIds:
+            params["albumId"] = albumIds
+        if artistIds:
+            params["artistId"] = artistIds
+
+        if not params:
+            return True
+
+        starResponse = await self.__request("GET", path, params)
+        return getAttributes(starResponse).get("status") == "ok"
+
+    async def star(
+        self, ids: list[str] = (), albumIds: list[str] = (), artistIds: list[str] = ()
+    ) -> bool:
+        """Star several songs, albums and artists with one request."""
+        return await self.__starRequest("star", list(ids), list(albumIds), list(artistIds))
+
+    async def unstar(
+        self, ids: list[str] = (), albumIds: list[str] = (), artistIds: list[str] = ()
+    ) -> bool:
+        """Remove the star of several songs, albums and artists with one request."""
+        return await self.__starRequest("unstar", list(ids), list(albumIds), list(artistIds))
+
+    async def setRating(self, id: str, rating: int) -> bool:
+        """Rate a song, album or artist from 1 to 5 (0 removes the rating)."""
+        params = {
+            "id": id,
+            "rating": rating
+        }
+        ratingResponse = await self.__request("GET", "setRating", params)
+
+        return getAttributes(ratingResponse).get("status") == "ok"
+
+    async def scrobble(
+        self, ids: list[str], times: list[int] | None = None, submission: bool = True
+    ) -> bool:
+        """Register plays of several songs with one request.
+
+        :param times: play start of each song, in milliseconds since the epoch
+        """
+        params = {
+            "id": ids,
+            "submission": "true" if submission else "false"
+        }
+
+        if times:
+            params["time"] = times
+
+        scrobbleResponse = await self.__request("GET", "scrobble", params)
+        scrobble = getAttributes(scrobbleResponse)
+
+        return scrobble.get("status") == "ok"
+
     def getCoverArtUrl(self, id: str) -> str:
+        # token ใช้ได้ตลอดจนกว่ารหัสผ่านจะเปลี่ยน (entry reload → api ใหม่) จึงจำ URL ไว้ได้
+        # แต่ถ้าสลับ endpoint ไปแล้ว URL เดิมก็ใช้ไม่ได้
+        if self.__coverBase != self.url:
+            self.__coverUrls.clear()
+            self.__coverBase = self.url
+
+        url = self.__coverUrls.get(id)
+        if url is not None:
+            return url
+
         params = {
             "id": id
         }
@@ -222,6 +826,10 @@ class SubsonicApi:
         query = "&".join([f"{k}={v}" for k, v in p.items()])
         url = f"{self.url}/rest/getCoverArt.view?{query}"
 
+        self.__coverUrls[id] = url
+        while len(self.__coverUrls) > self.songIndexSize:
+            self.__coverUrls.popitem(last=False)
+
         return url
 
 
@@ -258,6 +866,26 @@ class SubsonicApi:
 
         return url
 
+    def getSongHlsUrl(self, id: str, bitRates: list[int] | None = None) -> str:
+        """Return the HLS playlist URL of a song.
+
+        :param bitRates: bitrate ladder in kbps; with more than one the server
+            returns a variant playlist and the player switches between them.
+        """
+        params: dict[str, Any] = {
+            "id": id,
+        }
+
+        if bitRates:
+            params["bitRate"] = [str(b) for b in bitRates]
+
+        p = self.__getRequestParams(params)
+
+        query = "&".join([f"{k}={v}" for k, v in self.__expandParams(p)])
+        url = f"{self.url}/rest/hls.m3u8?{query}"
+
+        return url
+
 
 
     async def __aenter__(self) -> Self:
@@ -272,14 +900,22 @@ class SubsonicApi:
         media_type: str,
         media_id: str,
         shuffle: bool = False,
+        profile: StreamProfile = DEFAULT_PROFILE,
     ) -> list[dict]:
-        """Resolve media_type + media_id into a list of track dicts with stream_url & mime_type.
+        """Resolve media_type + media_id into a list of track dicts with stream_url & mime_type."""
+        tracks = await self.async_fetch_tracks(media_type, media_id)
+
+        return self.prepareTracks(tracks, shuffle, profile)
+
+    async def async_fetch_tracks(self, media_type: str, media_id: str) -> list[dict]:
+        """Resolve media_type + media_id into the list of song dicts.
 
         media_type:
             - "album"    -> use getAlbum()
             - "playlist" -> use getPlaylist()
             - "track"    -> use getSong()
-            - "genre"    -> use getSongsByGenre()
+            - "genre"    -> use getSongsByGenre() (first page only, see iterSongsByGenre)
+            - "folder"   -> songs directly inside a getMusicDirectory() directory
             - "artist"   -> collect songs from all albums of this artist (may be heavy)
         """
 
@@ -296,13 +932,18 @@ class SubsonicApi:
             tracks = playlist.get("songs", []) or []
 
         elif media_type in ("track", "song"):
-            song = await self.getSong(media_id)
+            song = self.getCachedSong(media_id) or await self.getSong(media_id)
             if song:
                 tracks = [song]
 
         elif media_type in ("genre", "songs_by_genre"):
             tracks = await self.getSongsByGenre(media_id)
 
+        elif media_type in ("folder", "directory"):
+            # เฉพาะเพลงที่อยู่ใน directory นี้ตรงๆ (ไม่ลงไปใน sub directory)
+            directory = await self.getMusicDirectory(media_id)
+            tracks = [c for c in directory.get("children", []) if c.get("isDir") != "true"]
+
         elif media_type == "artist":
             # NOTE: ตรงนี้อาจจะช้า ถ้า artist มีหลาย album
             artist = await self.getArtist(media_id)
@@ -317,9 +958,29 @@ class SubsonicApi:
 
         # ถ้า type ไม่ match ข้างบน ก็จะได้ tracks = [] กลับไป
 
+        return tracks
+
+    def prepareTracks(
+        self,
+        tracks: list[dict],
+        shuffle: bool = False,
+        profile: StreamProfile = DEFAULT_PROFILE,
+        streamUrl: Callable[[str, str | None, int | None], str] | None = None,
+    ) -> list[dict]:
+        """Return copies of the song dicts with stream_url & mime_type added.
+
+        Songs may come from a cache, so they are copied before being shuffled
+        or annotated. Format and bitrate of each stream come from ``profile``;
+        ``streamUrl`` builds the URL (defaults to getSongStreamUrl).
+        """
+        if streamUrl is None:
+            streamUrl = self.getSongStreamUrl
+
         if not tracks:
             return []
 
+        tracks = [dict(t) for t in tracks]
+
         # shuffle ถ้าขอมา
         if shuffle:
             random.shuffle(tracks)
@@ -330,22 +991,10 @@ class SubsonicApi:
             if not song_id:
                 continue
 
+            audio_format, max_bitrate, mime_type = profile.select(t)
+
             # URL สำหรับ stream เพลงนี้
-            t["stream_url"] = self.getSongStreamUrl(song_id)
-
-            # เดา mime_type จาก contentType หรือ suffix
-            mime_type = t.get("contentType")
-            if not mime_type:
-                suffix = (t.get("suffix") or "").lower()
-                if suffix == "flac":
-                    mime_type = "audio/flac"
-                elif suffix in ("mp3", "mpeg"):
-                    mime_type = "audio/mpeg"
-                elif suffix in ("m4a", "mp4"):
-                    mime_type = "audio/mp4"
-                else:
-                    mime_type = "music"
+            t["stream_url"] = streamUrl(song_id, audio_format, max_bitrate)
             t["mime_type"] = mime_type
 
         return tracks
-
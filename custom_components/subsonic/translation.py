@@ -5,7 +5,15 @@ LANGUAGES = {
         "tracks": "Tracks",
         "playlists": "Playlists",
         "radios": "Radios",
-        "genres": "Genres"
+        "genres": "Genres",
+        "next_page": "More…",
+        "favorites": "Favorites",
+        "folders": "Folders",
+        "smartlist_newest": "Recently added",
+        "smartlist_recent": "Recently played",
+        "smartlist_frequent": "Most played",
+        "smartlist_highest": "Top rated",
+        "smartlist_starred": "Starred albums"
     },
     "pt-BR": {
         "artists": "Artistas",
@@ -13,7 +21,15 @@ LANGUAGES = {
         "tracks": "Músicas",
         "playlists": "Playlists",
         "radios": "Rádios",
-        "genres": "Gêneros"
+        "genres": "Gêneros",
+        "next_page": "Mais…",
+        "favorites": "Favoritos",
+        "folders": "Pastas",
+        "smartlist_newest": "Adicionados recentemente",
+        "smartlist_recent": "Tocados recentemente",
+        "smartlist_frequent": "Mais tocados",
+        "smartlist_highest": "Mais bem avaliados",
+        "smartlist_starred": "Álbuns favoritos"
     }
 }
 
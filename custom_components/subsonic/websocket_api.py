@@ -0,0 +1,125 @@
+from __future__ import annotations
+
+import base64
+import hashlib
+import json
+from typing import Any
+
+import voluptuous as vol
+
+from homeassistant.components import websocket_api
+from homeassistant.core import HomeAssistant, callback
+
+from .const import DOMAIN
+from .library import KINDS
+
+MAX_LIMIT = 500
+DEFAULT_LIMIT = 100
+
+
+@callback
+def async_register_websocket_commands(hass: HomeAssistant) -> None:
+    websocket_api.async_register_command(hass, websocket_library_query)
+
+
+def _queryHash(msg: dict) -> str:
+    query = [msg.get("entry_id"), msg["kind"], msg.get("filter"), msg.get("sort"), msg["descending"]]
+    return hashlib.sha1(json.dumps(query, sort_keys=True).encode()).hexdigest()[:12]
+
+
+def _encodeCursor(offset: int, queryHash: str, version: int) -> str:
+    raw = json.dumps({"o": offset, "q": queryHash, "v": version}).encode()
+    return base64.urlsafe_b64encode(raw).decode()
+
+
+def _decodeCursor(cursor: str, queryHash: str) -> tuple[int, int] | None:
+    """Return the offset and library version of a cursor of this query."""
+    try:
+        data = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        offset = int(data["o"])
+        version = int(data["v"])
+    except (ValueError, TypeError, KeyError):
+        return None
+
+    # cursor จาก query อื่น (filter/sort ไม่ตรงกัน) ใช้ไม่ได้
+    if data.get("q") != queryHash or offset < 0:
+        return None
+
+    return offset, version
+
+
+def _getEntryData(hass: HomeAssistant, entryId: str | None):
+    entries: dict = hass.data.get(DOMAIN, {})
+
+    if entryId is not None:
+        return entries.get(entryId)
+
+    return next(iter(entries.values()), None)
+
+
+@websocket_api.websocket_command(
+    {
+        vol.Required("type"): f"{DOMAIN}/library/query",
+        vol.Optional("entry_id"): str,
+        vol.Required("kind"): vol.In(KINDS),
+        vol.Optional("filter"): {str: vol.Any(str, int, float, bool)},
+        vol.Optional("sort"): str,
+        vol.Optional("descending", default=False): bool,
+        vol.Optional("limit", default=DEFAULT_LIMIT): vol.All(
+            int, vol.Range(min=1, max=MAX_LIMIT)
+        ),
+        vol.Optional("cursor"): str,
+        vol.Optional("fields"): [str],
+    }
+)
+@websocket_api.async_response
+async def websocket_library_query(
+    hass: HomeAssistant, connection: websocket_api.ActiveConnection, msg: dict[str, Any]
+) -> None:
+    """Return one page of a filtered and sorted library listing."""
+    entryData = _getEntryData(hass, msg.get("entry_id"))
+    if entryData is None:
+        connection.send_error(msg["id"], websocket_api.ERR_NOT_FOUND, "Subsonic entry not found")
+        return
+
+    queryHash = _queryHash(msg)
+    offset, version = 0, None
+
+    if "cursor" in msg:
+        decoded = _decodeCursor(msg["cursor"], queryHash)
+        if decoded is None:
+            connection.send_error(msg["id"], websocket_api.ERR_INVALID_FORMAT, "Invalid cursor")
+            return
+
+        offset, version = decoded
+
+    try:
+        items = await entryData.library.async_query(
+            msg["kind"], msg.get("filter"), msg.get("sort"), msg["descending"]
+        )
+    except Exception as err:
+        connection.send_error(msg["id"], websocket_api.ERR_UNKNOWN_ERROR, str(err))
+        return
+
+    # library ถูก sync ใหม่ระหว่างหน้า → offset เดิมชี้ไปคนละรายการแล้ว
+    current = entryData.library.version
+    if version is not None and version != current:
+        connection.send_error(
+            msg["id"], websocket_api.ERR_INVALID_FORMAT, "Library changed, query again without cursor"
+        )
+        return
+
+    end = offset + msg["limit"]
+    page = items[offset:end]
+
+    if fields := msg.get("fields"):
+        page = [{k: item[k] for k in fields if k in item} for item in page]
+
+    connection.send_result(
+        msg["id"],
+        {
+            "items": page,
+            "total": len(items),
+            "next_cursor": _encodeCursor(end, queryHash, current) if end < len(items) else None,
+        },
+    )
@@ -21,6 +21,17 @@ def getAttributes(xml: str) -> dict:
     root = ET.fromstring(xml)
     return {attr: root.get(attr) for attr in root.keys()}
 
+def getTagsChildTexts(xml: str, tag: str, child: str) -> list[tuple[dict, list[str]]]:
+    xml = xml.replace("xmlns=\"http://subsonic.org/restapi\"", "")
+    root = ET.fromstring(xml)
+    tagsItens = root.findall(f'.//{tag}')
+    itens = [
+        ({attr: item.get(attr) for attr in item.keys()}, [c.text for c in item.findall(child)])
+        for item in tagsItens
+    ]
+
+    return itens
+
 def getTagsTexts(xml: str, tag: str) -> list[str]:
     xml = xml.replace("xmlns=\"http://subsonic.org/restapi\"", "")
     root = ET.fromstring(xml)